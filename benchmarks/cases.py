@@ -0,0 +1,132 @@
+import logging
+import time
+from functools import partial
+from typing import Callable, Dict, List, NamedTuple
+
+from bson import encode
+from bson.raw_bson import RawBSONDocument
+
+from benchmarks.generator import researcher_dicts
+from fixtures.models.researcher import Researcher
+from mongo_odm.repos.hydration import hydration_pool
+from mongo_odm.repos.repo import MongoObjRepo
+from mongo_odm.utils.utils import iter_counter
+
+BENCHMARK_DB = 'mongo_odm_benchmarks'
+BENCHMARK_COLLECTION = 'researchers'
+HYDRATION_PROCESSES = 4
+
+_LOGGER = logging.getLogger('benchmarks')
+
+
+class Case(NamedTuple):
+    name: str
+    run: Callable[[int], float]
+    needs_db: bool = False
+
+
+def timed(func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def hydrate_trusted(n: int) -> float:
+    docs = [Researcher(doc).data_dict for doc in researcher_dicts(n)]
+    return timed(lambda: [Researcher(dict(doc), trusted=True)
+                          for doc in docs])
+
+
+def hydrate_verified(n: int) -> float:
+    docs = list(researcher_dicts(n))
+    return timed(lambda: [Researcher(dict(doc)) for doc in docs])
+
+
+def hydrate_verified_pool(n: int) -> float:
+    """ Verified hydration from raw BSON through a pool of
+        HYDRATION_PROCESSES workers, as `query` does it, for comparison
+        with `hydrate_verified`. The pool is started before timing. """
+    raws = [RawBSONDocument(encode(doc)) for doc in researcher_dicts(n)]
+    trusted = partial(Researcher, trusted=True)
+    pool = hydration_pool(HYDRATION_PROCESSES)
+    list(pool.hydrate(Researcher, raws[:HYDRATION_PROCESSES]))
+    return timed(lambda: [trusted(doc)
+                          for doc in pool.hydrate(Researcher, raws)])
+
+
+def hash_models(n: int) -> float:
+    models = [Researcher(doc, trusted=True) for doc in researcher_dicts(n)]
+    return timed(lambda: [model.__hash__() for model in models])
+
+
+def iterate(n: int) -> float:
+    return timed(lambda: sum(1 for _ in range(n)))
+
+
+def iterate_with_counter(n: int) -> float:
+    return timed(lambda: sum(1 for _ in iter_counter(range(n),
+                                                     logger=_LOGGER)))
+
+
+def bulk_insert(n: int) -> float:
+    repo = _empty_repo()
+    docs = list(researcher_dicts(n))
+    return timed(lambda: repo.bulk_insert(docs))
+
+
+def bulk_update(n: int) -> float:
+    repo = _filled_repo(n)
+    docs = list(researcher_dicts(n, seed=1))
+    return timed(lambda: repo.bulk_update(docs))
+
+
+def find(n: int) -> float:
+    repo = _filled_repo(n)
+    return timed(lambda: sum(1 for _ in repo.find({}, batch_size=1000)))
+
+
+def query(n: int) -> float:
+    repo = _filled_repo(n)
+    return timed(lambda: sum(1 for _ in repo.query({}, batch_size=1000)))
+
+
+def all_parallel(n: int) -> float:
+    repo = _filled_repo(n)
+    return timed(lambda: sum(1 for _ in repo.all_parallel()))
+
+
+def drop_benchmark_db() -> None:
+    _empty_repo()._collection.database.client.drop_database(BENCHMARK_DB)
+
+
+def _empty_repo() -> MongoObjRepo:
+    repo = MongoObjRepo(BENCHMARK_COLLECTION,
+                        _db=BENCHMARK_DB,
+                        _type=Researcher)
+    repo.delete_all()
+    return repo
+
+
+def _filled_repo(n: int) -> MongoObjRepo:
+    repo = _empty_repo()
+    repo.bulk_insert(researcher_dicts(n))
+    return repo
+
+
+CASES: List[Case] = [
+    Case('hydrate_trusted', hydrate_trusted),
+    Case('hydrate_verified', hydrate_verified),
+    Case('hydrate_verified_pool', hydrate_verified_pool),
+    Case('hash', hash_models),
+    Case('iterate', iterate),
+    Case('iter_counter', iterate_with_counter),
+    Case('bulk_insert', bulk_insert, needs_db=True),
+    Case('bulk_update', bulk_update, needs_db=True),
+    Case('find', find, needs_db=True),
+    Case('query', query, needs_db=True),
+    Case('all_parallel', all_parallel, needs_db=True),
+]
+
+
+def cases_by_name() -> Dict[str, Case]:
+    return {case.name: case for case in CASES}
@@ -0,0 +1,40 @@
+import random
+from typing import Dict, Generator
+
+COUNTRIES = [('belgium', 'be'), ('netherlands', 'nl'), ('france', 'fr'),
+             ('germany', 'de'), ('serbia', 'rs')]
+KEYWORDS = ['databases', 'genomics', 'optics', 'linguistics', 'economics',
+            'robotics', 'ecology', 'statistics', 'chemistry', 'history']
+
+
+def researcher_dicts(n: int,
+                     seed: int = 0) -> Generator[Dict, None, None]:
+    """ Yields `n` researcher documents shaped like the `Researcher` fixture,
+        the same ones for the same `seed`. """
+    rand = random.Random(seed)
+    for i in range(n):
+        first_name = f'First_{rand.randrange(10000)}'
+        last_name = f'Last_{rand.randrange(100000)}'
+        country_name, country_code = rand.choice(COUNTRIES)
+        yield {
+            '_id': f'{i:09d}',
+            'first_name': first_name,
+            'last_name': last_name,
+            'full_name': f'{first_name} {last_name}',
+            'h_index': rand.randrange(100),
+            'citation_count': rand.randrange(100000),
+            'country': {'name': country_name, 'code': country_code},
+            'keywords': rand.sample(KEYWORDS, 3),
+            'identifiers': [{'name': 'test', 'value': str(i)},
+                            {'name': 'orcid',
+                             'value': f'0000-{rand.randrange(10 ** 8):08d}'}],
+            'experiences': [
+                {'title': f'Title_{j}',
+                 'from_year': 2000 + j,
+                 'to_year': 2001 + j,
+                 'organisation': {
+                     'name': f'Organisation_{rand.randrange(1000)}',
+                     'country': {'name': country_name,
+                                 'code': country_code}}}
+                for j in range(rand.randrange(1, 4))],
+        }
@@ -0,0 +1,136 @@
+""" Runs the benchmarks, saves the results as JSON and compares them with a
+    stored baseline. Throughput depends on the machine, so no baseline is
+    shipped; save one first on the machine that runs the comparison:
+
+    DB_CONFIGS=tests/fixtures/db_configs PYTHONPATH=.:tests \\
+        python -m benchmarks.run --sizes 10000 100000 \\
+        --baseline baseline.json --save-baseline
+    DB_CONFIGS=tests/fixtures/db_configs PYTHONPATH=.:tests \\
+        python -m benchmarks.run --sizes 10000 100000 \\
+        --output results.json --baseline baseline.json
+
+    Exits with status 1 if any benchmark is slower than the baseline by more
+    than the tolerance. Benchmarks that need MongoDB are skipped when no
+    server answers. """
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from typing import Dict, List
+
+import pymongo
+from pymongo.errors import PyMongoError
+
+from benchmarks.cases import CASES, drop_benchmark_db
+from mongo_odm.session.session import MONGO_CLIENT
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+DEFAULT_TOLERANCE = 0.25
+
+
+def mongo_available() -> bool:
+    try:
+        with pymongo.timeout(2):
+            MONGO_CLIENT.admin.command('ping')
+        return True
+    except PyMongoError:
+        return False
+
+
+def run(sizes: List[int],
+        names: List[str] = None,
+        repeat: int = 3,
+        with_db: bool = True) -> Dict:
+    """ Runs every case `repeat` times per size and keeps the fastest run.
+        Results are keyed by `<case>/<size>`. """
+    results = {}
+    for case in CASES:
+        if names and case.name not in names:
+            continue
+        if case.needs_db and not with_db:
+            print(f'{case.name}: skipped, MongoDB is not available')
+            continue
+        for size in sizes:
+            seconds = min(case.run(size) for _ in range(repeat))
+            key = f'{case.name}/{size}'
+            results[key] = {'seconds': seconds,
+                            'docs_per_sec': size / seconds if seconds else 0}
+            print(f'{key}: {results[key]["docs_per_sec"]:,.0f} docs/s')
+
+    if with_db:
+        drop_benchmark_db()
+
+    return {'meta': {'python': platform.python_version(),
+                     'pymongo': pymongo.version,
+                     'machine': platform.machine(),
+                     'time': time.strftime('%Y-%m-%dT%H:%M:%SZ',
+                                           time.gmtime())},
+            'results': results}
+
+
+def regressions(results: Dict,
+                baseline: Dict,
+                tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """ Benchmarks in both `results` and `baseline` whose throughput dropped
+        by more than `tolerance`, as a fraction of the baseline. """
+    slower = []
+    for key, result in results['results'].items():
+        if key not in baseline['results']:
+            continue
+        expected = baseline['results'][key]['docs_per_sec']
+        ratio = result['docs_per_sec'] / expected if expected else 1
+        if ratio < 1 - tolerance:
+            slower.append(f'{key}: {result["docs_per_sec"]:,.0f} docs/s, '
+                          f'{ratio:.0%} of baseline {expected:,.0f} docs/s')
+    return slower
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=DEFAULT_SIZES)
+    parser.add_argument('--cases', nargs='+',
+                        help='names of the benchmarks to run, default all')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='file to save the results to')
+    parser.add_argument('--baseline', help='baseline file to compare with')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='save the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+    if args.baseline and not args.save_baseline and \
+            not os.path.exists(args.baseline):
+        parser.error(f'{args.baseline} does not exist; save a baseline '
+                     f'first with --save-baseline')
+
+    results = run(sizes=args.sizes,
+                  names=args.cases,
+                  repeat=args.repeat,
+                  with_db=mongo_available())
+
+    if args.output:
+        _save(results, args.output)
+
+    if args.baseline and args.save_baseline:
+        _save(results, args.baseline)
+    elif args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        slower = regressions(results, baseline, tolerance=args.tolerance)
+        for line in slower:
+            print(f'REGRESSION {line}')
+        if slower:
+            return 1
+
+    return 0
+
+
+def _save(results: Dict, path: str) -> None:
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,8 @@
 from mongo_odm.config.config import COLLECTIONS, DBS
-from mongo_odm.config.env_vars import (DB_CONFIGS, MONGO_CERT_PATH, MONGO_HOST,
-                                       MONGO_PASSWORD, MONGO_PORT,
+from mongo_odm.config.env_vars import (DB_CONFIGS, DB_CONFIGS_CACHE,
+                                       MONGO_CERT_PATH, MONGO_HOST,
+                                       MONGO_INDEX_SYNC, MONGO_METRICS,
+                                       MONGO_METRICS_BYTES, MONGO_PASSWORD,
+                                       MONGO_PORT,
                                        MONGO_USERNAME, MONGO_USE_REPLICA_SET,
                                        MONGO_USE_SSL)
@@ -1,22 +1,108 @@
 import importlib
 import os
-from typing import Dict, List, NamedTuple, Type
+import pickle
+import threading
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import (Any, Callable, Dict, Iterator, List, NamedTuple, Optional,
+                    Tuple, Type)
 
 import pymongo
 import yaml
 
-from mongo_odm.config.env_vars import DB_CONFIGS
+from mongo_odm.config.env_vars import (DB_CONFIGS, DB_CONFIGS_CACHE,
+                                       MONGO_COMPRESSORS,
+                                       MONGO_MAX_IDLE_TIME_MS,
+                                       MONGO_MAX_POOL_SIZE,
+                                       MONGO_MIN_POOL_SIZE,
+                                       MONGO_WAIT_QUEUE_TIMEOUT_MS)
 from mongo_odm.utils import files_in_dir
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 
-DBS = dict()
-for file in files_in_dir(os.path.join(PROJECT_ROOT, DB_CONFIGS),
-                         extension='yaml'):
-    db_config = yaml.load(open(file, 'r'),
-                          Loader=yaml.FullLoader)
 
-    DBS[os.path.basename(file)[:-5]] = db_config
+class LazyMapping(Mapping):
+    """ Read-only mapping that is built by `load` the first time it is
+        used, so importing a module defining one costs nothing. """
+
+    def __init__(self, load: Callable[[], Dict]) -> None:
+        self._load = load
+        self._data = None
+        self._lock = threading.Lock()
+
+    def _mapping(self) -> Dict:
+        if self._data is None:
+            with self._lock:
+                if self._data is None:
+                    self._data = self._load()
+        return self._data
+
+    def __getitem__(self, key: str) -> Any:
+        return self._mapping()[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._mapping()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._mapping())
+
+    def __len__(self) -> int:
+        return len(self._mapping())
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self._mapping()!r})'
+
+    def reset(self) -> None:
+        """ Makes the next access load the mapping again. """
+        with self._lock:
+            self._data = None
+
+
+def load_dbs() -> Dict[str, Dict]:
+    """ Parses the yaml files in DB_CONFIGS, or loads them from the
+        DB_CONFIGS_CACHE file if none of them changed since it was
+        written. """
+    files = files_in_dir(os.path.join(PROJECT_ROOT, DB_CONFIGS),
+                         extension='yaml')
+    key = [(file, os.stat(file).st_mtime_ns, os.stat(file).st_size)
+           for file in files]
+
+    if DB_CONFIGS_CACHE:
+        dbs = _cached_dbs(DB_CONFIGS_CACHE, key)
+        if dbs is not None:
+            return dbs
+
+    dbs = {}
+    for file in files:
+        with open(file, 'r') as f:
+            dbs[os.path.basename(file)[:-5]] = yaml.load(
+                f, Loader=yaml.FullLoader)
+
+    if DB_CONFIGS_CACHE:
+        _cache_dbs(DB_CONFIGS_CACHE, key, dbs)
+    return dbs
+
+
+def _cached_dbs(path: str, key: List) -> Optional[Dict[str, Dict]]:
+    try:
+        with open(path, 'rb') as f:
+            cached_key, dbs = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        return None
+    return dbs if cached_key == key else None
+
+
+def _cache_dbs(path: str, key: List, dbs: Dict[str, Dict]) -> None:
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((key, dbs), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+DBS: Mapping = LazyMapping(load_dbs)
 
 
 class Field(NamedTuple):
@@ -28,36 +114,105 @@ class Index(NamedTuple):
     fields: List[Field]
     unique: bool = False
     name: str = None
+    sparse: bool = False
+    partial_filter_expression: Optional[Dict] = None
+    expire_after_seconds: Optional[int] = None
+    collation: Optional[Dict] = None
+    wildcard_projection: Optional[Dict] = None
+
+
+class Cache(NamedTuple):
+    max_size: int = 1000
+    ttl: float = 60
 
 
 class Collection(NamedTuple):
     db: str
     indices: List[Index]
-    model: Type
+    model_path: str
     mongo_ec2: bool = False
+    cache: Optional[Cache] = None
+
+    @property
+    def model(self) -> Type:
+        """ The model class, imported the first time it is needed. """
+        return get_model(self.model_path)
+
+
+class ClientOptions(NamedTuple):
+    """ Connection pool options of the client used for a database. """
+    max_pool_size: int = MONGO_MAX_POOL_SIZE
+    min_pool_size: int = MONGO_MIN_POOL_SIZE
+    max_idle_time_ms: Optional[int] = (int(MONGO_MAX_IDLE_TIME_MS)
+                                       if MONGO_MAX_IDLE_TIME_MS else None)
+    wait_queue_timeout_ms: Optional[int] = (
+        int(MONGO_WAIT_QUEUE_TIMEOUT_MS) if MONGO_WAIT_QUEUE_TIMEOUT_MS
+        else None)
+    compressors: Tuple[str, ...] = tuple(
+        c for c in MONGO_COMPRESSORS.split(',') if c)
+
+    def params(self) -> Dict[str, Any]:
+        """ The options as MongoClient keyword arguments. """
+        params = {'maxPoolSize': self.max_pool_size,
+                  'minPoolSize': self.min_pool_size}
+        if self.max_idle_time_ms is not None:
+            params['maxIdleTimeMS'] = self.max_idle_time_ms
+        if self.wait_queue_timeout_ms is not None:
+            params['waitQueueTimeoutMS'] = self.wait_queue_timeout_ms
+        if self.compressors:
+            params['compressors'] = ','.join(self.compressors)
+        return params
 
 
 ORDERS = {'asc': pymongo.ASCENDING,
-          'desc': pymongo.DESCENDING}
+          'desc': pymongo.DESCENDING,
+          'hashed': pymongo.HASHED,
+          'text': pymongo.TEXT,
+          '2dsphere': pymongo.GEOSPHERE}
 
 
 def indices(collection: Dict) -> List[Index]:
+    """ Every field has its own `order`, defaulting to the `order` of its
+        index, which defaults to `asc`. Wildcard indices use a `$**` field
+        name. """
     _indices = []
     for index in collection.get('indices', []):
-        _fields = []
-        for _field in index['fields']:
-            if 'order' in index:
-                order = ORDERS[index['order']]
-            else:
-                order = ORDERS['asc']
-            _fields.append(Field(name=_field['name'], order=order))
-        unique = index.get('unique', False)
-        name = index.get('name', None)
-        _indices.append(Index(fields=_fields, unique=unique, name=name))
+        default_order = index.get('order', 'asc')
+        _fields = [Field(name=_field['name'],
+                         order=ORDERS[_field.get('order', default_order)])
+                   for _field in index['fields']]
+        _indices.append(Index(
+            fields=_fields,
+            unique=index.get('unique', False),
+            name=index.get('name', None),
+            sparse=index.get('sparse', False),
+            partial_filter_expression=index.get('partial_filter_expression'),
+            expire_after_seconds=index.get('expire_after_seconds'),
+            collation=index.get('collation'),
+            wildcard_projection=index.get('wildcard_projection')))
 
     return _indices
 
 
+def cache(collection: Dict) -> Optional[Cache]:
+    _cache = collection.get('cache')
+    if not _cache:
+        return None
+    return Cache(**_cache)
+
+
+def client_options(db_name: str = None) -> ClientOptions:
+    """ Options of the `client` block of the database configuration, with
+        the environment variables as defaults. """
+    _client = dict(DBS[db_name].get('client') or {}) if db_name in DBS else {}
+    if isinstance(_client.get('compressors'), str):
+        _client['compressors'] = _client['compressors'].split(',')
+    if 'compressors' in _client:
+        _client['compressors'] = tuple(_client['compressors'])
+    return ClientOptions(**_client)
+
+
+@lru_cache(maxsize=None)
 def get_model(_model: str) -> Type:
     model_type = _model.split('.')[-1]
     model_path = _model.rstrip(model_type)[:-1]
@@ -72,15 +227,14 @@ def all_collections() -> Dict[str, Collection]:
     _collections = {}
     for db_name, db in DBS.items():
         for collection in db.get('collections', []):
-            if 'model' in db:
-                model = get_model(db['model'])
-            else:
-                model = get_model(collection['model'])
+            model_path = (db['model'] if 'model' in db
+                          else collection['model'])
             _collections[collection['name']] = Collection(
                 db=db_name,
                 indices=indices(collection),
-                model=model)
+                model_path=model_path,
+                cache=cache(collection))
     return _collections
 
 
-COLLECTIONS: Dict[str, Collection] = all_collections()
+COLLECTIONS: Mapping = LazyMapping(all_collections)
@@ -17,6 +17,9 @@ MONGO_PASSWORD: str = os.getenv(
 DB_CONFIGS: str = os.getenv(
     key='DB_CONFIGS',
     default='')
+DB_CONFIGS_CACHE: str = os.getenv(
+    key='DB_CONFIGS_CACHE',
+    default='')
 MONGO_USE_SSL: bool = str2bool(os.getenv(
     key='MONGO_USE_SSL',
     default='False'))
@@ -26,3 +29,27 @@ MONGO_CERT_PATH: str = os.getenv(
 MONGO_USE_REPLICA_SET: bool = str2bool(os.getenv(
     key='MONGO_USE_REPLICA_SET',
     default='False'))
+MONGO_METRICS: bool = str2bool(os.getenv(
+    key='MONGO_METRICS',
+    default='False'))
+MONGO_METRICS_BYTES: bool = str2bool(os.getenv(
+    key='MONGO_METRICS_BYTES',
+    default='False'))
+MONGO_INDEX_SYNC: str = os.getenv(
+    key='MONGO_INDEX_SYNC',
+    default='eager')
+MONGO_MAX_POOL_SIZE: int = int(os.getenv(
+    key='MONGO_MAX_POOL_SIZE',
+    default='5000'))
+MONGO_MIN_POOL_SIZE: int = int(os.getenv(
+    key='MONGO_MIN_POOL_SIZE',
+    default='0'))
+MONGO_MAX_IDLE_TIME_MS: str = os.getenv(
+    key='MONGO_MAX_IDLE_TIME_MS',
+    default='')
+MONGO_WAIT_QUEUE_TIMEOUT_MS: str = os.getenv(
+    key='MONGO_WAIT_QUEUE_TIMEOUT_MS',
+    default='')
+MONGO_COMPRESSORS: str = os.getenv(
+    key='MONGO_COMPRESSORS',
+    default='')
@@ -1 +1,3 @@
-from mongo_odm.models.base import MongoBase, NON_HASHABLE_FIELDS
+from mongo_odm.models.base import (MongoBase, NON_HASHABLE_FIELDS,
+                                   update_document)
+from mongo_odm.models.lazy import LazyDocument
@@ -1,5 +1,6 @@
+import copy
 import datetime
-from typing import Dict
+from typing import Dict, List, Optional
 
 from dict_objectify import Base, Datetime, Text, dict_base_hash
 
@@ -12,12 +13,30 @@ class MongoBase(Base):
     created_at = Datetime()
     updated_at = Datetime()
 
-    def __init__(self, data_dict: Dict = None, **kwargs) -> None:
+    _snapshot: Optional[Dict] = None
+    _hash_verified: bool = True
+
+    def __init__(self,
+                 data_dict: Dict = None,
+                 *,
+                 trusted: bool = False,
+                 **kwargs) -> None:
+        """ With `trusted`, a stored `_hash` is kept as it is instead of being
+            recomputed, which is how repos hydrate documents they read. The
+            hash is then verified lazily by `ensure_hash`. """
         super().__init__(data_dict=data_dict, **kwargs)
         if not data_dict:
             super().__setattr__('created_at', now())
             super().__setattr__('updated_at', now())
-        self.check_hash_and_update()
+        if trusted and '_hash' in self.data_dict:
+            super().__setattr__('_hash_verified', False)
+        else:
+            self.check_hash_and_update()
+
+    def __setattr__(self, key, value):
+        super().__setattr__(key, value)
+        if key not in NON_HASHABLE_FIELDS:
+            super().__setattr__('_hash_verified', False)
 
     def __hash__(self):
         dct = self.data_dict.copy()
@@ -31,6 +50,71 @@ class MongoBase(Base):
         if not hasattr(self, '_hash') or _hash != self._hash:
             super().__setattr__('updated_at', now())
             super().__setattr__('_hash', _hash)
+        super().__setattr__('_hash_verified', True)
+
+    def ensure_hash(self) -> None:
+        """ Recomputes the hash only if the object was loaded as trusted or
+            had fields assigned since the hash was last computed. Changes
+            made in place to nested objects still need an explicit
+            `check_hash_and_update`. """
+        if not self._hash_verified:
+            self.check_hash_and_update()
+
+    def is_tracked(self) -> bool:
+        return self._snapshot is not None
+
+    def mark_clean(self) -> None:
+        """ Snapshots the current state of the object. From now on `changes`
+            reports what differs from this snapshot. """
+        super().__setattr__('_snapshot', copy.deepcopy(self.data_dict))
+
+    def changes(self) -> Dict[str, Dict]:
+        """ Minimal MongoDB update document that turns the snapshot taken by
+            `mark_clean` into the current state of the object. """
+        if self._snapshot is None:
+            raise ValueError(f'Object of type [Type: {type(self)}] '
+                             f'is not tracking changes. '
+                             f'Call mark_clean() first.')
+        return update_document(self._snapshot, self.data_dict)
+
+    def changed_paths(self) -> List[str]:
+        return sorted(path
+                      for paths in self.changes().values()
+                      for path in paths)
+
+
+def update_document(old: Dict, new: Dict) -> Dict[str, Dict]:
+    """ Diffs two documents into `$set`, `$unset` and `$push` operators.
+        Nested documents are diffed per field, lists that only got new
+        elements appended are pushed and all other changes are set. """
+    update = dict()
+    _diff(old, new, '', update)
+    return update
+
+
+def _diff(old: Dict, new: Dict, prefix: str, update: Dict) -> None:
+    for key, value in new.items():
+        path = f'{prefix}{key}'
+        if key not in old:
+            update.setdefault('$set', {})[path] = value
+            continue
+
+        old_value = old[key]
+        if old_value == value:
+            continue
+        elif isinstance(old_value, dict) and isinstance(value, dict):
+            _diff(old_value, value, f'{path}.', update)
+        elif (isinstance(old_value, list) and isinstance(value, list)
+              and len(value) > len(old_value)
+              and value[:len(old_value)] == old_value):
+            update.setdefault('$push', {})[path] = {
+                '$each': value[len(old_value):]}
+        else:
+            update.setdefault('$set', {})[path] = value
+
+    for key in old:
+        if key not in new:
+            update.setdefault('$unset', {})[f'{prefix}{key}'] = ''
 
 
 def now() -> datetime:
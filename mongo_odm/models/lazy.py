@@ -0,0 +1,120 @@
+from copy import deepcopy
+from typing import (Any, Dict, ItemsView, Iterator, KeysView, Tuple,
+                    ValuesView)
+
+from bson import decode
+from bson.raw_bson import RawBSONDocument
+
+
+class LazyDocument(dict):
+    """ dict backed by a RawBSONDocument. A field is decoded into plain
+        Python values the first time it is read and then kept in the dict.
+
+        Operations that need every field (iterating, copying, pickling,
+        comparing, deleting) decode the remaining fields first, after which
+        the object behaves exactly like a dict. C code that reads the dict
+        storage directly, like `bson.encode`, needs `inflate` to be called
+        beforehand; the repos do that before writing. """
+
+    def __init__(self, raw: RawBSONDocument) -> None:
+        super().__init__()
+        self._raw = raw
+        self._inflated = False
+
+    def __missing__(self, key: str) -> Any:
+        if self._inflated or key not in self._raw:
+            raise KeyError(key)
+        value = _plain(self._raw[key])
+        super().__setitem__(key, value)
+        return value
+
+    def inflate(self) -> 'LazyDocument':
+        if not self._inflated:
+            for key in self._raw:
+                if not super().__contains__(key):
+                    super().__setitem__(key, _plain(self._raw[key]))
+            self._inflated = True
+        return self
+
+    def __contains__(self, key: object) -> bool:
+        if self._inflated:
+            return super().__contains__(key)
+        return super().__contains__(key) or key in self._raw
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __len__(self) -> int:
+        if self._inflated:
+            return super().__len__()
+        return len(self._raw) + sum(1 for key in super().__iter__()
+                                    if key not in self._raw)
+
+    def __iter__(self) -> Iterator[str]:
+        self.inflate()
+        return super().__iter__()
+
+    def __eq__(self, other: object) -> bool:
+        self.inflate()
+        return super().__eq__(other)
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        self.inflate()
+        return super().__repr__()
+
+    def __delitem__(self, key: str) -> None:
+        self.inflate()
+        super().__delitem__(key)
+
+    def keys(self) -> KeysView:
+        self.inflate()
+        return super().keys()
+
+    def values(self) -> ValuesView:
+        self.inflate()
+        return super().values()
+
+    def items(self) -> ItemsView:
+        self.inflate()
+        return super().items()
+
+    def pop(self, *args) -> Any:
+        self.inflate()
+        return super().pop(*args)
+
+    def popitem(self) -> Tuple[str, Any]:
+        self.inflate()
+        return super().popitem()
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        self.inflate()
+        return super().setdefault(key, default)
+
+    def clear(self) -> None:
+        self.inflate()
+        super().clear()
+
+    def copy(self) -> Dict:
+        return dict(self.items())
+
+    def __reduce__(self):
+        return dict, (self.copy(),)
+
+    def __deepcopy__(self, memo: Dict) -> Dict:
+        return deepcopy(self.copy(), memo)
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, RawBSONDocument):
+        return decode(value.raw)
+    elif isinstance(value, list):
+        return [_plain(element) for element in value]
+    return value
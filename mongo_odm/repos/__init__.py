@@ -1,3 +1,12 @@
-from mongo_odm.repos.repo import (MongoDocRepo, MongoObjRepo, MongoRepo,
-                                  Projection, Range, SortLimit)
+from mongo_odm.repos.async_repo import (AsyncMongoDocRepo, AsyncMongoObjRepo,
+                                        AsyncMongoRepo)
+from mongo_odm.repos.async_repos import AsyncMongoRepos
+from mongo_odm.repos.buffered_writer import BufferedWriter
+from mongo_odm.repos.hydration import HydrationPool
+from mongo_odm.repos.query_shapes import QueryShapeRecorder
+from mongo_odm.repos.repo import (decode_page_token, encode_page_token,
+                                  IdLookup, IdRange, MongoDocRepo,
+                                  MongoObjRepo, MongoRepo, Page, Projection,
+                                  Range, SortLimit, SyncResult)
 from mongo_odm.repos.repos import MongoRepos
+from mongo_odm.repos.unit_of_work import UnitOfWork
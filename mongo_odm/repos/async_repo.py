@@ -0,0 +1,309 @@
+from typing import (Any, AsyncGenerator, Callable, Dict, Iterable, List,
+                    Optional, Tuple, Type, Union)
+
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.errors import DuplicateKeyError
+from pymongo.operations import InsertOne
+from pymongo.results import BulkWriteResult, DeleteResult
+
+from mongo_odm.config.config import COLLECTIONS
+from mongo_odm.repos.cache import document_cache
+from mongo_odm.repos.repo import (_bson_size, _inflated, _prepared,
+                                  _trusted_type, _upsert_request,
+                                  BULK_CHUNK_SIZE, BaseType,
+                                  BulkWriteResults, Projection)
+from mongo_odm.session.async_session import async_db
+from mongo_odm.utils.utils import sized_chunks
+
+
+class AsyncMongoDocRepo(object):
+    """ Asyncio counterpart of MongoDocRepo. Cursors are exposed as async
+        generators and every other method is a coroutine.
+
+        The collection is not created when the repo is constructed; use
+        AsyncMongoRepos.repo to get a repo whose collection and indices
+        are guaranteed to exist. The underlying client is resolved per
+        running event loop, so a repo may be shared between loops. Writes
+        evict documents from the cache the blocking repos of the
+        collection share. """
+
+    def __init__(self,
+                 _collection: str,
+                 _db: str = None) -> None:
+        if _collection in COLLECTIONS:
+            _db = COLLECTIONS[_collection].db
+        self._db_name = _db
+        self._collection_name = _collection
+        self.cache = document_cache(_collection)
+
+    @property
+    def _collection(self) -> AsyncCollection:
+        return async_db(self._db_name)[self._collection_name]
+
+    async def all(
+            self,
+            projection: Union[Projection, Dict[str, bool], List[str]] = None
+    ) -> AsyncGenerator[Dict, None]:
+        async for doc in self.find(query_filter={},
+                                   projection=projection):
+            yield doc
+
+    async def find(
+            self,
+            query_filter: Dict = None,
+            limit: int = 0,
+            max_time_ms: Optional[int] = None,
+            skip: int = 0,
+            sort: List[Tuple] = None,
+            projection: Union[Projection, Dict[str, bool], List[str]] = None,
+            batch_size: int = 100) -> AsyncGenerator[Dict, None]:
+        if projection and isinstance(projection, Projection):
+            projection = projection.projection()
+
+        _query = self._collection.find(filter=query_filter,
+                                       limit=limit,
+                                       skip=skip,
+                                       sort=sort,
+                                       projection=projection,
+                                       batch_size=batch_size,
+                                       max_time_ms=max_time_ms)
+        async for doc in _query:
+            yield doc
+
+    async def aggregate(self,
+                        pipeline: List[Dict],
+                        batch_size: int = 100) -> AsyncGenerator[Dict, None]:
+        _aggregate = await self._collection.aggregate(pipeline,
+                                                      batchSize=batch_size)
+        async for doc in _aggregate:
+            yield doc
+
+    async def find_one(self, query_filter: Dict) -> Optional[Dict]:
+        return await self._collection.find_one(query_filter)
+
+    def _invalidate(self, query_filter: Dict = None) -> None:
+        if self.cache is not None:
+            self.cache.invalidate(query_filter)
+
+    async def update_one(self,
+                         _id: str,
+                         update: Dict,
+                         upsert: bool = False) -> None:
+        await self._collection.update_one(
+            {'_id': _id}, {'$set': update}, upsert=upsert)
+        self._invalidate({'_id': _id})
+
+    async def insert_one(self, doc: Dict) -> None:
+        await self._collection.insert_one(doc)
+        self._invalidate({'_id': doc.get('_id')})
+
+    async def replace_one(self, doc: Dict) -> None:
+        await self._collection.replace_one(filter={'_id': doc['_id']},
+                                           replacement=doc)
+        self._invalidate({'_id': doc['_id']})
+
+    async def insert_or_replace_one(self, doc: Dict) -> None:
+        try:
+            await self.insert_one(doc)
+        except DuplicateKeyError:
+            await self.replace_one(doc)
+
+    async def bulk_insert(
+            self,
+            docs: Iterable[Dict],
+            chunk_size: int = BULK_CHUNK_SIZE,
+            max_chunk_bytes: int = None) -> Optional[BulkWriteResult]:
+        return await self._bulk_write_chunks(docs,
+                                             request=InsertOne,
+                                             chunk_size=chunk_size,
+                                             max_chunk_bytes=max_chunk_bytes)
+
+    async def bulk_update(
+            self,
+            docs: Iterable[Dict],
+            chunk_size: int = BULK_CHUNK_SIZE,
+            max_chunk_bytes: int = None) -> Optional[BulkWriteResult]:
+        return await self._bulk_write_chunks(docs,
+                                             request=_upsert_request,
+                                             chunk_size=chunk_size,
+                                             max_chunk_bytes=max_chunk_bytes)
+
+    async def _bulk_write_chunks(
+            self,
+            docs: Iterable[Dict],
+            request: Callable[[Dict], Any],
+            chunk_size: int = BULK_CHUNK_SIZE,
+            max_chunk_bytes: int = None) -> Optional[BulkWriteResult]:
+        results = BulkWriteResults()
+        offset = 0
+        try:
+            for chunk in sized_chunks(map(_inflated, docs),
+                                      n=chunk_size,
+                                      max_bytes=max_chunk_bytes,
+                                      sizeof=_bson_size):
+                result = await self._collection.bulk_write(
+                    [request(doc) for doc in chunk], ordered=False)
+                results.add(result, offset=offset)
+                offset += len(chunk)
+        finally:
+            self._invalidate()
+
+        return results.result()
+
+    async def delete_all(self, query_filter: Dict = None) -> None:
+        if not query_filter:
+            query_filter = {}
+        await self._collection.delete_many(query_filter)
+        self._invalidate()
+
+    async def delete_one(self, query_filter: Dict) -> DeleteResult:
+        result = await self._collection.delete_one(query_filter)
+        self._invalidate(query_filter)
+        return result
+
+    async def delete_by_id(self, _id: str) -> DeleteResult:
+        return await self.delete_one({'_id': _id})
+
+    async def exists(self, query_filter: Dict) -> bool:
+        return bool(await self.count(query_filter))
+
+    async def exists_one(self, query_filter: Dict) -> bool:
+        return await self.count(query_filter) == 1
+
+    async def exists_id(self, _id: str) -> bool:
+        return await self.exists_one({'_id': _id})
+
+    async def distinct(self, key: str, query_filter: Dict) -> List[str]:
+        return list(await self._collection.distinct(key, query_filter))
+
+    async def count(self, query_filter: Dict = None) -> int:
+        if query_filter is None:
+            query_filter = {}
+        return await self._collection.count_documents(query_filter)
+
+    async def field_values(self,
+                           field_name: str,
+                           query_filter: Dict = None,
+                           batch_size: int = 100) -> AsyncGenerator:
+        projection = {field_name: True}
+        if field_name != '_id':
+            projection['_id'] = False
+        async for doc in self.find(query_filter,
+                                   projection=projection,
+                                   batch_size=batch_size):
+            yield doc[field_name]
+
+    async def count_distinct_field_values(self, field: str) -> Optional[int]:
+        pipeline = [
+            {'$group': {'_id': f'${field}'}},
+            {'$group': {'_id': 1, 'count': {'$sum': 1}}},
+        ]
+        try:
+            cursor = await self._collection.aggregate(pipeline)
+            distinct_target_field = (await cursor.to_list())[0]['count']
+
+            return distinct_target_field
+
+        except IndexError:
+            return None
+
+    async def all_ids(self,
+                      limit: int = 0,
+                      skip: int = 0,
+                      batch_size: int = 100) -> AsyncGenerator[str, None]:
+        async for doc in self.find(query_filter={},
+                                   projection={'_id': True},
+                                   limit=limit,
+                                   skip=skip,
+                                   batch_size=batch_size):
+            yield doc['_id']
+
+    async def all_ids_chunks(
+            self,
+            limit: int = 0,
+            skip: int = 0,
+            batch_size: int = 100) -> AsyncGenerator[List[str], None]:
+        chunk = []
+        async for _id in self.all_ids(limit=limit,
+                                      skip=skip,
+                                      batch_size=batch_size):
+            chunk.append(_id)
+            if len(chunk) == batch_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+class AsyncMongoObjRepo(AsyncMongoDocRepo):
+    """ Asyncio counterpart of MongoObjRepo. """
+
+    def __init__(self,
+                 _collection: str,
+                 _db: str = None,
+                 _type: Type = BaseType) -> None:
+        super().__init__(_collection, _db)
+        self._type = _type
+        self._trusted_type = _trusted_type(_type)
+
+    async def all_objs(self) -> AsyncGenerator[BaseType, None]:
+        async for obj in self.query({}):
+            yield obj
+
+    async def insert_obj(self, doc: BaseType) -> None:
+        await self.insert_one(_prepared(doc).data_dict)
+
+    async def delete_obj(self, doc: BaseType) -> None:
+        await self.delete_by_id(doc._id)
+
+    async def replace_obj(self, doc: BaseType) -> None:
+        doc = _prepared(doc)
+        await self._collection.replace_one(filter={'_id': doc._id},
+                                           replacement=doc.data_dict)
+        self._invalidate({'_id': doc._id})
+
+    async def insert_or_replace_obj(self, doc: BaseType) -> None:
+        try:
+            await self.insert_obj(doc)
+        except DuplicateKeyError:
+            await self.replace_obj(doc)
+
+    async def query_by_id(self, _id: str) -> Optional[BaseType]:
+        return await self.query_one({'_id': _id})
+
+    async def query_one(self, query_filter: Dict) -> Optional[BaseType]:
+        json_dict = await self.find_one(query_filter)
+        if json_dict:
+            return self._trusted_type(json_dict)
+
+    async def query_aggregate(
+            self,
+            pipeline: List[Dict],
+            batch_size: int = 100) -> AsyncGenerator[BaseType, None]:
+        async for json_dict in self.aggregate(pipeline,
+                                              batch_size=batch_size):
+            yield self._trusted_type(json_dict)
+
+    async def query(self,
+                    query_filter: Dict = None,
+                    limit: int = 0,
+                    max_time_ms: Optional[int] = None,
+                    skip: int = 0,
+                    sort: List[Tuple] = None,
+                    projection: Union[Dict[str, bool], List[str]] = None,
+                    batch_size: int = 100) -> AsyncGenerator[BaseType, None]:
+        async for json_dict in self.find(query_filter=query_filter,
+                                         limit=limit,
+                                         max_time_ms=max_time_ms,
+                                         skip=skip,
+                                         sort=sort,
+                                         projection=projection,
+                                         batch_size=batch_size):
+            yield self._trusted_type(json_dict)
+
+
+class AsyncMongoRepo(AsyncMongoObjRepo):
+    def __init__(self, _collection: str) -> None:
+        super().__init__(_db=COLLECTIONS[_collection].db,
+                         _collection=_collection,
+                         _type=COLLECTIONS[_collection].model)
@@ -0,0 +1,22 @@
+from typing import List
+
+from mongo_odm.config.config import COLLECTIONS
+from mongo_odm.repos.async_repo import AsyncMongoRepo
+from mongo_odm.session.async_session import async_collection
+
+
+class AsyncMongoRepos(object):
+    _cache = {}
+
+    @classmethod
+    async def all_repos(cls) -> List[AsyncMongoRepo]:
+        return [await cls.repo(name)
+                for name in COLLECTIONS.keys()]
+
+    @classmethod
+    async def repo(cls, name: str) -> AsyncMongoRepo:
+        if name not in cls._cache:
+            await async_collection(name)
+            cls._cache[name] = AsyncMongoRepo(name)
+
+        return cls._cache[name]
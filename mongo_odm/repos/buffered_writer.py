@@ -0,0 +1,284 @@
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import decode, encode
+from bson.raw_bson import RawBSONDocument
+from pymongo.operations import DeleteOne, InsertOne, ReplaceOne, UpdateOne
+
+from mongo_odm.repos.repo import (_inflated, _prepared, BaseType,
+                                  MongoDocRepo)
+from mongo_odm.repos.unit_of_work import (_MERGED_OPERATIONS, DELETE, INSERT,
+                                          REPLACE, UPSERT)
+
+UPDATE = 'update'
+
+MAX_OPS = 1000
+MAX_BYTES = 16 * 1024 * 1024
+MAX_DELAY = 1.0
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class BufferedWriter(object):
+    """ Write-behind buffer in front of a repo.
+
+        Inserts, replaces, `$set` updates and deletes are buffered, merged
+        per `_id` and sent by a background thread as one unordered bulk
+        write once `max_ops` operations or `max_bytes` of BSON are buffered,
+        or `max_delay` seconds after the first of them. Documents are
+        encoded when they are queued, so objects may be changed afterwards.
+        While the thread is writing, one more batch can fill up; producers
+        wait after that, which bounds the memory used.
+
+        Operations on the same `_id` are merged as in UnitOfWork, and
+        updates are folded into queued documents and into each other. When
+        they cannot be merged, e.g. an insert after an update or a second
+        insert, the queued operations are handed to the thread first, so
+        that they are written before the new one.
+
+        An error of a bulk write is raised by the next call on the writer.
+        Used as a context manager it is closed on exit, which writes what is
+        left. """
+
+    def __init__(self,
+                 repo: MongoDocRepo,
+                 max_ops: int = MAX_OPS,
+                 max_bytes: int = MAX_BYTES,
+                 max_delay: float = MAX_DELAY) -> None:
+        self.repo = repo
+        self.max_ops = max_ops
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+
+        self._condition = threading.Condition()
+        self._buffer: Dict[Tuple, Tuple[str, Any, int]] = {}
+        self._bytes = 0
+        self._first_queued = 0.0
+        self._hand_over = False
+        self._in_flight = False
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+        self._unkeyed = itertools.count()
+
+    def __enter__(self) -> 'BufferedWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        try:
+            self.close()
+        except Exception:
+            if exc_type is None:
+                raise
+            _LOGGER.exception('Writing buffered operations failed')
+
+    def insert_one(self, doc: Dict) -> None:
+        self._queue(doc.get('_id'), INSERT, _raw(doc))
+
+    def insert_obj(self, doc: BaseType) -> None:
+        self.insert_one(_prepared(doc).data_dict)
+
+    def replace_one(self, doc: Dict) -> None:
+        self._queue(doc['_id'], REPLACE, _raw(doc))
+
+    def replace_obj(self, doc: BaseType) -> None:
+        self.replace_one(_prepared(doc).data_dict)
+
+    def update_one(self, _id: Any, update: Dict) -> None:
+        """ Buffered `$set` of `update`, like `MongoDocRepo.update_one`. """
+        self._queue(_id, UPDATE, dict(update))
+
+    def delete_by_id(self, _id: Any) -> None:
+        self._queue(_id, DELETE, None)
+
+    def flush(self) -> None:
+        """ Writes everything buffered and waits until it is written. """
+        with self._condition:
+            self._hand_over = True
+            self._condition.notify_all()
+            self._condition.wait_for(
+                lambda: not self._buffer and not self._in_flight)
+            self._hand_over = False
+            self._raise_error()
+
+    def close(self) -> None:
+        with self._condition:
+            if self._closed:
+                return
+        self.flush()
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _queue(self, _id: Any, operation: str, payload: Any) -> None:
+        key = (('_id', _id) if _id is not None
+               else ('unkeyed', next(self._unkeyed)))
+        with self._condition:
+            self._raise_error()
+            if self._closed:
+                raise ValueError('Buffered writer is closed')
+            self._start()
+            self._condition.wait_for(lambda: not self._is_full())
+
+            if key in self._buffer:
+                merged = _merged(self._buffer[key][:2], (operation, payload))
+                if merged is _NOT_MERGEABLE:
+                    self._hand_over = True
+                    self._condition.notify_all()
+                    self._condition.wait_for(lambda: key not in self._buffer)
+                else:
+                    self._bytes -= self._buffer.pop(key)[2]
+                    operation, payload = merged
+
+            if not self._buffer:
+                self._first_queued = time.monotonic()
+            size = _size(operation, payload)
+            self._buffer[key] = (operation, payload, size)
+            self._bytes += size
+            self._condition.notify_all()
+
+    def _is_full(self) -> bool:
+        return len(self._buffer) >= self.max_ops or \
+            self._bytes >= self.max_bytes
+
+    def _start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._write_batches,
+                                            daemon=True)
+            self._thread.start()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _write_batches(self) -> None:
+        while True:
+            with self._condition:
+                batch = self._next_batch()
+                while batch is None:
+                    if self._closed and not self._buffer:
+                        return
+                    self._condition.wait(self._timeout())
+                    batch = self._next_batch()
+
+            try:
+                self.repo.bulk_write(_requests(batch), ordered=False)
+            except Exception as e:
+                with self._condition:
+                    self._error = self._error or e
+            finally:
+                with self._condition:
+                    self._in_flight = False
+                    self._condition.notify_all()
+
+    def _timeout(self) -> Optional[float]:
+        if not self._buffer:
+            return None
+        return max(0.0, self._first_queued + self.max_delay -
+                   time.monotonic())
+
+    def _next_batch(self) -> Optional[List]:
+        """ Takes the buffer if it is due to be written, else returns None.
+            Called with the condition held. """
+        if not self._buffer or self._in_flight:
+            return None
+        if not (self._hand_over or self._closed or self._is_full() or
+                time.monotonic() - self._first_queued >= self.max_delay):
+            return None
+        batch = [(key, operation, payload)
+                 for key, (operation, payload, _) in self._buffer.items()]
+        self._buffer = {}
+        self._bytes = 0
+        self._hand_over = False
+        self._in_flight = True
+        self._condition.notify_all()
+        return batch
+
+
+_NOT_MERGEABLE = object()
+
+
+def _merged(queued: Tuple[str, Any], new: Tuple[str, Any]) -> Any:
+    """ Single operation with the effect of `queued` followed by `new`, or
+        _NOT_MERGEABLE. """
+    queued_operation, queued_payload = queued
+    operation, payload = new
+    if operation == UPDATE:
+        if queued_operation == DELETE:
+            return queued
+        if queued_operation == UPDATE:
+            if _conflicting(queued_payload, payload):
+                return _NOT_MERGEABLE
+            return UPDATE, {**queued_payload, **payload}
+        doc = decode(queued_payload.raw)
+        for path, value in payload.items():
+            if not _set_path(doc, path, value):
+                return _NOT_MERGEABLE
+        return queued_operation, _raw(doc)
+
+    if queued_operation == UPDATE:
+        if operation == INSERT:
+            return _NOT_MERGEABLE
+        return new
+
+    if (queued_operation, operation) not in _MERGED_OPERATIONS:
+        return _NOT_MERGEABLE
+    return _MERGED_OPERATIONS[(queued_operation, operation)], payload
+
+
+def _conflicting(queued: Dict, update: Dict) -> bool:
+    """ Whether a path of one update is a parent of a path of the other,
+        which MongoDB does not allow in one `$set`. """
+    return any(a.startswith(f'{b}.') or b.startswith(f'{a}.')
+               for a in queued for b in update)
+
+
+def _set_path(doc: Dict, path: str, value: Any) -> bool:
+    """ Sets the dotted `path` of `doc` like `$set` does, creating missing
+        embedded documents. Returns False, leaving `doc` partly changed, if
+        the path may index an array or passes through a value that is not a
+        document, which is left to the server. """
+    *parents, field = path.split('.')
+    if any(part.isdigit() for part in parents + [field]):
+        return False
+    for parent in parents:
+        if parent not in doc:
+            doc[parent] = {}
+        elif not isinstance(doc[parent], dict):
+            return False
+        doc = doc[parent]
+    doc[field] = value
+    return True
+
+
+def _raw(doc: Dict) -> RawBSONDocument:
+    return RawBSONDocument(encode(_inflated(doc)))
+
+
+def _size(operation: str, payload: Any) -> int:
+    if operation == DELETE:
+        return 0
+    if operation == UPDATE:
+        return len(encode(payload))
+    return len(payload.raw)
+
+
+def _requests(batch: List[Tuple[Tuple, str, Any]]) -> List[Any]:
+    requests = []
+    for (_, _id), operation, payload in batch:
+        if operation == INSERT:
+            requests.append(InsertOne(payload))
+        elif operation == DELETE:
+            requests.append(DeleteOne({'_id': _id}))
+        elif operation == UPDATE:
+            requests.append(UpdateOne({'_id': _id}, {'$set': payload}))
+        else:
+            requests.append(ReplaceOne({'_id': _id}, payload,
+                                       upsert=operation == UPSERT))
+    return requests
@@ -0,0 +1,70 @@
+import threading
+from typing import Dict, Optional, Tuple
+
+from bson import encode
+from bson.raw_bson import RawBSONDocument
+
+from mongo_odm.config.config import COLLECTIONS
+from mongo_odm.utils.cache import LRUCache
+
+
+class DocumentCache(object):
+    """ Read-through cache of raw documents found by `find_one`.
+
+        Lookups by `_id` alone are kept apart from other filters, so a write
+        to a single document only evicts that document and the results of
+        the other filters. Documents are cached as immutable raw BSON and
+        decoded on every hit, so callers never share mutable state. """
+
+    def __init__(self, max_size: int, ttl: float = None) -> None:
+        self._by_id = LRUCache(max_size=max_size, ttl=ttl)
+        self._by_filter = LRUCache(max_size=max_size, ttl=ttl)
+
+    def _cache(self, query_filter: Dict) -> LRUCache:
+        return self._by_id if _is_id_filter(query_filter) else self._by_filter
+
+    def get(self, query_filter: Dict) -> Optional[RawBSONDocument]:
+        return self._cache(query_filter).get(encode(query_filter))
+
+    def set(self, query_filter: Dict, doc: RawBSONDocument) -> None:
+        self._cache(query_filter).set(encode(query_filter), doc)
+
+    def invalidate(self, query_filter: Dict = None) -> None:
+        """ Evicts what a write matching `query_filter` may have changed.
+            Without a filter, or for filters other than a single `_id`,
+            everything is evicted. """
+        if query_filter is not None and _is_id_filter(query_filter):
+            self._by_id.pop(encode(query_filter))
+        else:
+            self._by_id.clear()
+        self._by_filter.clear()
+
+    def stats(self) -> Dict[str, int]:
+        by_id = self._by_id.stats()
+        by_filter = self._by_filter.stats()
+        return {key: by_id[key] + by_filter[key] for key in by_id}
+
+
+# Caches by database and collection, shared by every repo of a collection so
+# that a write through any of them evicts what the others cached.
+_CACHES: Dict[Tuple[str, str], DocumentCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def document_cache(_collection: str) -> Optional[DocumentCache]:
+    """ The cache of the configured collection, or None if it has no cache
+        configured. """
+    if _collection not in COLLECTIONS or not COLLECTIONS[_collection].cache:
+        return None
+    _coll = COLLECTIONS[_collection]
+    key = (_coll.db, _collection)
+    with _CACHES_LOCK:
+        if key not in _CACHES:
+            _CACHES[key] = DocumentCache(max_size=_coll.cache.max_size,
+                                         ttl=_coll.cache.ttl)
+        return _CACHES[key]
+
+
+def _is_id_filter(query_filter: Dict) -> bool:
+    return (len(query_filter) == 1 and '_id' in query_filter
+            and not isinstance(query_filter['_id'], dict))
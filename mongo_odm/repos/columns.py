@@ -0,0 +1,86 @@
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+# Arrow types of numpy dtypes, besides datetime64[ms]. Columns of any other
+# dtype, or of none, get the type pyarrow infers.
+_ARROW_TYPES = {'int32': 'int32',
+                'int64': 'int64',
+                'float32': 'float32',
+                'float64': 'float64',
+                'bool': 'bool_',
+                'str': 'string'}
+
+
+def field_value(doc: Mapping, path: str) -> Any:
+    """ Value at the dotted `path` of `doc`, or None if it is missing. """
+    value = doc
+    for key in path.split('.'):
+        if not isinstance(value, Mapping):
+            return None
+        value = value.get(key)
+    return value
+
+
+def projection(fields: List[str]) -> Dict[str, bool]:
+    _projection = {field: True for field in fields}
+    if '_id' not in _projection:
+        _projection['_id'] = False
+    return _projection
+
+
+def columns(docs: Iterable[Mapping],
+            fields: List[str],
+            dtypes: Optional[Dict[str, str]] = None,
+            arrow: bool = False) -> Any:
+    """ `fields` of `docs` as a dict of numpy arrays by field, or as a
+        pyarrow RecordBatch if `arrow` is set.
+
+        Values are gathered into one list per field and converted in one
+        call per column. Missing values become NaN in float arrays and
+        nulls in Arrow columns; other numpy dtypes do not allow them. """
+    values: Dict[str, List] = {field: [] for field in fields}
+    for doc in docs:
+        for field in fields:
+            values[field].append(field_value(doc, field))
+
+    dtypes = dtypes or {}
+    if arrow:
+        pa = _import('pyarrow')
+        return pa.RecordBatch.from_arrays(
+            [pa.array(values[field], type=_arrow_type(pa, dtypes.get(field)))
+             for field in fields],
+            names=fields)
+
+    np = _import('numpy')
+    return {field: _numpy_array(np, field, values[field], dtypes.get(field))
+            for field in fields}
+
+
+def _numpy_array(np, field: str, values: List, dtype: Optional[str]) -> Any:
+    if dtype is None or dtype == 'object':
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+        return array
+    if np.dtype(dtype).kind == 'f':
+        return np.array([np.nan if value is None else value
+                         for value in values], dtype=dtype)
+    if None in values:
+        raise ValueError(f'Field {field} is missing in some documents, '
+                         f'which {dtype} cannot hold; use a float or object '
+                         f'dtype, or Arrow')
+    return np.array(values, dtype=dtype)
+
+
+def _arrow_type(pa, dtype: Optional[str]) -> Any:
+    if dtype == 'datetime64[ms]':
+        return pa.timestamp('ms')
+    if dtype in _ARROW_TYPES:
+        return getattr(pa, _ARROW_TYPES[dtype])()
+    return None
+
+
+def _import(module: str) -> Any:
+    try:
+        return __import__(module)
+    except ImportError:
+        raise ImportError(f'Columnar results need {module}; install it, or '
+                          f'mongodb-odm[columns]') from None
@@ -0,0 +1,147 @@
+import atexit
+import multiprocessing
+import os
+from functools import partial
+from multiprocessing.pool import AsyncResult, Pool
+from queue import Queue
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from bson import decode, encode
+from bson.raw_bson import RawBSONDocument
+
+from mongo_odm.utils.utils import sized_chunks
+
+HYDRATION_BATCH_SIZE = 1000
+
+_POOLS: Dict[Tuple[int, int], 'HydrationPool'] = {}
+
+
+class HydrationPool(object):
+    """ Long-lived process pool that builds models from raw documents.
+
+        Documents are sent to the workers as raw BSON bytes, in batches. A
+        worker decodes each document once, passes it to the model type and
+        sends back only the top-level fields the model added or changed,
+        like a recomputed `_hash`. The caller decodes the document itself
+        and applies those fields, so no decoded document or model is
+        pickled in either direction.
+
+        This only pays off when the model type does real work, like
+        verifying hashes; building trusted models is cheaper than decoding
+        them twice, so the repos do that without the pool.
+
+        The worker processes are started on first use and kept until
+        `close` is called. """
+
+    def __init__(self, processes: int) -> None:
+        self.processes = processes
+        self._pool = None
+        self._pid = None
+
+    def _started_pool(self) -> Pool:
+        if self._pool is None or self._pid != os.getpid():
+            self._pool = multiprocessing.Pool(processes=self.processes)
+            self._pid = os.getpid()
+        return self._pool
+
+    def hydrate(self,
+                model_type: Callable,
+                docs: Iterable[Dict],
+                ordered: bool = False,
+                batch_size: int = HYDRATION_BATCH_SIZE) -> Iterable[Dict]:
+        """ Yields the data dicts of `docs` as `model_type` leaves them.
+
+            At most two batches per worker are in flight, so `docs` is
+            consumed at the pace of the caller. Unless `ordered` is set,
+            batches are yielded as soon as they are done. """
+        pool = self._started_pool()
+        # Batches in flight by number, in the order they were sent. Numbers
+        # of finished batches are put into `done` by the pool's result
+        # thread, so waiting for the next one does not poll.
+        pending: Dict[int, Tuple[List[bytes], AsyncResult]] = {}
+        done: Queue = Queue()
+
+        for number, batch in enumerate(sized_chunks(docs, n=batch_size)):
+            raws = [_raw(doc) for doc in batch]
+            finished = partial(_finished, done, number)
+            pending[number] = (raws, pool.apply_async(
+                _hydrated_fields, (model_type, raws),
+                callback=finished, error_callback=finished))
+            if len(pending) >= 2 * self.processes:
+                yield from _merged(*_next_done(pending, done, ordered))
+
+        while pending:
+            yield from _merged(*_next_done(pending, done, ordered))
+
+    def close(self) -> None:
+        if self._pool is not None and self._pid == os.getpid():
+            self._pool.close()
+            self._pool.join()
+        self._pool = None
+        self._pid = None
+
+
+def hydration_pool(processes: int) -> HydrationPool:
+    """ Pool of `processes` workers shared by all repos of this process. """
+    key = (os.getpid(), processes)
+    if key not in _POOLS:
+        _POOLS[key] = HydrationPool(processes)
+    return _POOLS[key]
+
+
+@atexit.register
+def close_hydration_pools() -> None:
+    for key in list(_POOLS):
+        _POOLS.pop(key).close()
+
+
+def _raw(doc: Dict) -> bytes:
+    if isinstance(doc, RawBSONDocument):
+        return doc.raw
+    return encode(doc)
+
+
+def _hydrated_fields(model_type: Callable,
+                     raws: List[bytes]) -> List[Optional[Dict]]:
+    hydrated_fields = []
+    for raw in raws:
+        doc = decode(raw)
+        # Models replace the top-level values they change, so the values
+        # of a shallow copy tell which ones those are.
+        original = dict(doc)
+        data_dict = model_type(doc).data_dict
+        changed = {key: value for key, value in data_dict.items()
+                   if original.get(key, _MISSING) is not value}
+        hydrated_fields.append(changed or None)
+    return hydrated_fields
+
+
+_MISSING = object()
+
+
+def _finished(done: Queue, number: int, _result: object) -> None:
+    done.put(number)
+
+
+def _next_done(pending: Dict[int, Tuple[List[bytes], AsyncResult]],
+               done: Queue,
+               ordered: bool) -> Tuple[List[bytes], List[Optional[Dict]]]:
+    """ First batch sent, or with `ordered` unset the first one finished,
+        whose numbers `done` receives. """
+    if ordered:
+        number = next(iter(pending))
+    else:
+        number = done.get()
+        while number not in pending:
+            number = done.get()
+    raws, result = pending.pop(number)
+    return raws, result.get()
+
+
+def _merged(raws: List[bytes],
+            hydrated_fields: List[Optional[Dict]]) -> Iterable[Dict]:
+    for raw, fields in zip(raws, hydrated_fields):
+        doc = decode(raw)
+        if fields:
+            doc.update(fields)
+        yield doc
@@ -0,0 +1,154 @@
+import json
+import threading
+import time
+from typing import (Any, Callable, Dict, Generator, Iterable, List,
+                    NamedTuple, Optional, Tuple)
+
+LOGICAL_OPERATORS = ('$and', '$or', '$nor')
+
+
+class QueryShape(NamedTuple):
+    """ A query with its values removed. `query_filter` is the JSON of the
+        normalised filter, in which every compared value is replaced by
+        its operator, and `sort` keeps fields and directions. """
+    collection: str
+    operation: str
+    query_filter: str
+    sort: Tuple[Tuple[str, int], ...] = ()
+
+
+class ShapeStats(NamedTuple):
+    shape: QueryShape
+    count: int
+    total_seconds: float
+    max_seconds: float
+
+
+class QueryShapeRecorder(object):
+    """ Counts how often every query shape is sent and how long it takes.
+
+        Recording is opt-in: set it as `shape_recorder` of one repo, or of
+        MongoDocRepo to record the queries of every repo. For cursors the
+        recorded time is the time spent fetching documents, not the time
+        the caller spends on them. """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats: Dict[QueryShape, List] = {}
+
+    def record(self,
+               collection: str,
+               operation: str,
+               query_filter: Optional[Dict],
+               sort: Optional[List[Tuple]],
+               seconds: float) -> None:
+        shape = query_shape(collection, operation, query_filter, sort)
+        with self._lock:
+            stats = self._stats.setdefault(shape, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+
+    def timed(self,
+              collection: str,
+              operation: str,
+              query_filter: Optional[Dict],
+              sort: Optional[List[Tuple]],
+              cursor: Iterable) -> Generator:
+        """ Yields from `cursor`, recording the time spent in it once it is
+            exhausted or closed. """
+        seconds = 0.0
+        iterator = iter(cursor)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    seconds += time.perf_counter() - start
+                yield item
+        finally:
+            self.record(collection, operation, query_filter, sort, seconds)
+
+    def shapes(self) -> List[ShapeStats]:
+        """ Recorded shapes, those taking the most time in total first. """
+        with self._lock:
+            stats = [ShapeStats(shape, *values)
+                     for shape, values in self._stats.items()]
+        return sorted(stats, key=lambda s: s.total_seconds, reverse=True)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def dump(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump([{'shape': stats.shape._asdict(),
+                        'count': stats.count,
+                        'total_seconds': stats.total_seconds,
+                        'max_seconds': stats.max_seconds}
+                       for stats in self.shapes()], f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> 'QueryShapeRecorder':
+        recorder = cls()
+        with open(path) as f:
+            for stats in json.load(f):
+                shape = stats['shape']
+                shape['sort'] = tuple(tuple(field) for field in shape['sort'])
+                recorder._stats[QueryShape(**shape)] = [
+                    stats['count'], stats['total_seconds'],
+                    stats['max_seconds']]
+        return recorder
+
+
+def query_shape(collection: str,
+                operation: str,
+                query_filter: Optional[Dict] = None,
+                sort: Optional[List[Tuple]] = None) -> QueryShape:
+    return QueryShape(
+        collection=collection,
+        operation=operation,
+        query_filter=json.dumps(normalized_filter(query_filter or {}),
+                                sort_keys=True),
+        sort=tuple((field, direction) for field, direction in sort or ()))
+
+
+def normalized_filter(query_filter: Dict) -> Dict:
+    """ `query_filter` with every value replaced by the operator applied to
+        it; `{'age': {'$gt': 30}, 'name': 'x'}` becomes
+        `{'age': ['$gt'], 'name': '$eq'}`. """
+    shape = {}
+    for key, value in query_filter.items():
+        if key in LOGICAL_OPERATORS:
+            shape[key] = [normalized_filter(clause) for clause in value]
+        elif key.startswith('$'):
+            shape[key] = key
+        else:
+            shape[key] = _operators(value)
+    return shape
+
+
+def timed_call(recorder: Optional[QueryShapeRecorder],
+               collection: str,
+               operation: str,
+               query_filter: Optional[Dict],
+               call: Callable[[], Any]) -> Any:
+    """ Result of `call`, recorded by `recorder` if there is one. """
+    if recorder is None:
+        return call()
+    start = time.perf_counter()
+    try:
+        return call()
+    finally:
+        recorder.record(collection, operation, query_filter, None,
+                        time.perf_counter() - start)
+
+
+def _operators(value: Any) -> Any:
+    if isinstance(value, dict) and value and all(
+            key.startswith('$') for key in value):
+        return sorted(value)
+    return '$eq'
@@ -0,0 +1,83 @@
+""" References between collections. A model class referenced by another
+    model names the collection holding the referenced documents in its
+    `relations_with` attribute. References are matched with those documents
+    by `_id`, or by any of their `identifiers`. """
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Type
+
+from dict_objectify import Array, Base
+
+
+def relation(model_type: Type, field: str) -> str:
+    """ Collection that the references at the dotted `field` path of
+        `model_type` point to. """
+    _type = model_type
+    for part in field.split('.'):
+        descriptor = getattr(_type, part, None)
+        if isinstance(descriptor, Array):
+            _type = descriptor.model
+        elif isinstance(descriptor, Base):
+            _type = type(descriptor)
+        else:
+            raise ValueError(f'[Field: {field}] of [Type: {model_type}] '
+                             f'does not hold objects')
+    collection = getattr(_type, 'relations_with', None)
+    if not collection:
+        raise ValueError(f'[Type: {_type}] at [Field: {field}] does not '
+                         f'declare relations_with')
+    return collection
+
+
+def references(json_dict: Dict, field: str) -> List[Dict]:
+    """ Documents at the dotted `field` path of `json_dict`, with lists
+        along the path flattened. """
+    values = [json_dict]
+    for part in field.split('.'):
+        next_values = []
+        for value in values:
+            value = value.get(part) if isinstance(value, dict) else None
+            if isinstance(value, list):
+                next_values.extend(v for v in value if isinstance(v, dict))
+            elif isinstance(value, dict):
+                next_values.append(value)
+        values = next_values
+    return values
+
+
+def reference_keys(json_dict: Dict) -> List[Tuple[Hashable, ...]]:
+    keys = []
+    if json_dict.get('_id') is not None:
+        keys.append(('_id', json_dict['_id']))
+    for identifier in json_dict.get('identifiers') or ():
+        if isinstance(identifier, dict) and 'value' in identifier:
+            keys.append(('identifier', identifier.get('name'),
+                         identifier['value']))
+    return keys
+
+
+def relation_filter(_references: List[Dict]) -> Optional[Dict]:
+    """ Query for every document that any of `_references` may point to,
+        or None if they hold neither ids nor identifiers. Identifiers are
+        matched by value only, so the results still need `resolved`. """
+    ids, values = set(), set()
+    for key in (key for ref in _references for key in reference_keys(ref)):
+        if key[0] == '_id':
+            ids.add(key[1])
+        else:
+            values.add(key[2])
+
+    clauses = []
+    if ids:
+        clauses.append({'_id': {'$in': sorted(ids, key=str)}})
+    if values:
+        clauses.append({'identifiers.value': {'$in': sorted(values,
+                                                            key=str)}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {'$or': clauses}
+
+
+def resolved(reference: Dict, by_key: Dict[Tuple, Any]) -> Optional[Any]:
+    """ First of the related objects, indexed by their `reference_keys`,
+        that `reference` points to. """
+    return next((by_key[key] for key in reference_keys(reference)
+                 if key in by_key), None)
@@ -1,27 +1,85 @@
 import multiprocessing
+import os
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from multiprocessing import Process, Queue
-from typing import (Dict, Generator, Iterator, List, NamedTuple, Optional,
-                    Tuple, Type, TypeVar, Union)
+from functools import partial
+from multiprocessing import Process
+from typing import (Any, Callable, Dict, Generator, Iterable, Iterator, List,
+                    NamedTuple, Optional, Tuple, Type, TypeVar, Union)
 
+from bson import CodecOptions, decode, decode_all, encode
+from bson.raw_bson import RawBSONDocument
 from dict_objectify import Base
-from pymongo import UpdateOne
+from pymongo import ASCENDING, UpdateOne
+from pymongo.collection import Collection
 from pymongo.errors import DuplicateKeyError
-from pymongo.operations import InsertOne
+from pymongo.operations import InsertOne, ReplaceOne
 from pymongo.results import BulkWriteResult, DeleteResult
 
 from mongo_odm.config.config import COLLECTIONS
+from mongo_odm.models.base import MongoBase
+from mongo_odm.models.lazy import LazyDocument
+from mongo_odm.repos.cache import document_cache
+from mongo_odm.repos.columns import columns
+from mongo_odm.repos.columns import projection as columns_projection
+from mongo_odm.repos.hydration import hydration_pool
+from mongo_odm.repos.query_shapes import QueryShapeRecorder, timed_call
+from mongo_odm.repos.relations import (reference_keys, references, relation,
+                                       relation_filter, resolved)
+from mongo_odm.session.index_sync import sync_collection
 from mongo_odm.session.session import collection, db
-from mongo_odm.utils.utils import chunks, iter_counter, spawn_scope
+from mongo_odm.utils.bson_files import (GZIP, read_segments, SEGMENT_BYTES,
+                                        write_segments)
+from mongo_odm.utils.shm_ring import RING_CAPACITY, SharedRing, wait_readable
+from mongo_odm.utils.utils import (chunks, iter_counter, prefetched,
+                                   sized_chunks, spawn_scope)
 
 BaseType = TypeVar('BaseType', bound=Base)
 
+NUM_OF_PROCESSES: int = multiprocessing.cpu_count()
+BULK_CHUNK_SIZE: int = 1000
+RAW_BSON_CODEC_OPTIONS = CodecOptions(document_class=RawBSONDocument)
+
 
 class Range(NamedTuple):
     skip: int
     limit: int
 
 
+class IdRange(NamedTuple):
+    """ Half-open `_id` range [lower, upper). `None` bounds are open. """
+    lower: Any = None
+    upper: Any = None
+
+    def query_filter(self, query_filter: Dict = None) -> Dict:
+        bounds = dict()
+        if self.lower is not None:
+            bounds['$gte'] = self.lower
+        if self.upper is not None:
+            bounds['$lt'] = self.upper
+
+        if not bounds:
+            return query_filter if query_filter else {}
+        if not query_filter:
+            return {'_id': bounds}
+        return {'$and': [query_filter, {'_id': bounds}]}
+
+
+class SyncResult(NamedTuple):
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+
+class IdLookup(NamedTuple):
+    """ Documents found for a list of ids, in the order of the ids or by
+        id, and the ids that were not found, in their order. """
+    found: Union[List, Dict[Any, Any]]
+    missing: List
+
+
 @dataclass
 class SortLimit:
     sort_field: str
@@ -51,17 +109,90 @@ class Projection:
         return projection
 
 
+@dataclass
+class Page:
+    docs: List[Dict]
+    next_token: Optional[str] = None
+
+
+def encode_page_token(values: List[Any]) -> str:
+    return urlsafe_b64encode(encode({'values': values})).decode('ascii')
+
+
+def decode_page_token(token: str) -> List[Any]:
+    return decode(urlsafe_b64decode(token.encode('ascii')))['values']
+
+
+class BulkWriteResults(object):
+    """ Merges results of consecutive chunks of one logical bulk write.
+        `offset` is the position of the chunk's first request in the whole
+        write, so upserted indexes refer to the original input. """
+
+    def __init__(self) -> None:
+        self._bulk_api_result = None
+        self._acknowledged = True
+
+    def add(self, result: BulkWriteResult, offset: int = 0) -> None:
+        if self._bulk_api_result is None:
+            self._bulk_api_result = {'writeErrors': [],
+                                     'writeConcernErrors': [],
+                                     'nInserted': 0,
+                                     'nUpserted': 0,
+                                     'nMatched': 0,
+                                     'nModified': 0,
+                                     'nRemoved': 0,
+                                     'upserted': []}
+        if not result.acknowledged:
+            self._acknowledged = False
+            return
+
+        total = self._bulk_api_result
+        chunk = result.bulk_api_result
+        for key in ('nInserted', 'nUpserted', 'nMatched', 'nModified',
+                    'nRemoved'):
+            total[key] += chunk.get(key, 0)
+        total['writeConcernErrors'].extend(chunk.get('writeConcernErrors',
+                                                     []))
+        for key in ('upserted', 'writeErrors'):
+            total[key].extend(dict(entry, index=entry['index'] + offset)
+                              for entry in chunk.get(key, []))
+
+    def result(self) -> Optional[BulkWriteResult]:
+        if self._bulk_api_result is not None:
+            return BulkWriteResult(self._bulk_api_result,
+                                   acknowledged=self._acknowledged)
+
+
 class MongoDocRepo(object):
     """ This is the most basic Mongo interface that deals with dictionaries
         directly. """
 
+    # Opt-in recorder of the shapes of find, find_one, count and distinct
+    # queries, set on a repo or on the class for every repo.
+    shape_recorder: Optional[QueryShapeRecorder] = None
+
     def __init__(self,
                  _collection: str,
                  _db: str = None) -> None:
-        if _collection in COLLECTIONS:
-            self._collection = collection(_collection)
-        else:
-            self._collection = db(_db)[_collection]
+        self._collection_name = _collection
+        self._db_name = _db
+        self._bound_collection = None
+        self._bound_pid = None
+
+        self.cache = document_cache(_collection)
+
+    @property
+    def _collection(self) -> Collection:
+        """ The collection of the client of the current process, which is
+            looked up again in a child process that inherited the repo. """
+        if self._bound_pid != os.getpid():
+            if self._collection_name in COLLECTIONS:
+                self._bound_collection = collection(self._collection_name)
+            else:
+                self._bound_collection = db(self._db_name)[
+                    self._collection_name]
+            self._bound_pid = os.getpid()
+        return self._bound_collection
 
     def all(self,
             projection: Union[Projection, Dict[str, bool], List[str]] = None,
@@ -74,80 +205,129 @@ class MongoDocRepo(object):
 
     def all_parallel(self,
                      projection: Union[Dict[str, bool], List[str]] = None,
+                     num_of_processes: int = NUM_OF_PROCESSES,
                      print_progress: bool = False,
                      print_step: int = 10000) -> Generator[Dict, None, None]:
-        _query = self._all_parallel(projection)
+        yield from self.find_parallel(query_filter={},
+                                      projection=projection,
+                                      num_of_processes=num_of_processes,
+                                      print_progress=print_progress,
+                                      print_step=print_step)
+
+    def find_parallel(self,
+                      query_filter: Dict = None,
+                      projection: Union[Dict[str, bool], List[str]] = None,
+                      num_of_processes: int = NUM_OF_PROCESSES,
+                      ring_capacity: int = RING_CAPACITY,
+                      print_progress: bool = False,
+                      print_step: int = 10000) -> Generator[Dict, None, None]:
+        """ Scans documents matching `query_filter` using one process per
+            disjoint `_id` range, so every document is yielded exactly once
+            even if the collection is written to during the scan. """
+        _query = self._find_partitioned(query_filter=query_filter,
+                                        projection=projection,
+                                        num_of_processes=num_of_processes,
+                                        ring_capacity=ring_capacity)
         if print_progress:
             _query = iter_counter(_query,
                                   print_step=print_step)
         yield from _query
 
-    def _all_parallel(self,
-                      projection: Union[Dict[str, bool], List[str]] = None
-                      ) -> Generator[Dict, None, None]:
-        total = self.count()
-
-        half_count = total // 2
-        other_half_count = total - half_count
-
-        sorts_limits = [SortLimit(sort_field='updated_at',
-                                  sort_direction=1,
-                                  limit=half_count),
-                        SortLimit(sort_field='updated_at',
-                                  sort_direction=-1,
-                                  limit=other_half_count)
-                        ]
-
-        num_of_processes = len(sorts_limits)
+    def id_ranges(self,
+                  query_filter: Dict = None,
+                  num_of_ranges: int = NUM_OF_PROCESSES) -> List[IdRange]:
+        """ Splits documents matching `query_filter` into at most
+            `num_of_ranges` contiguous `_id` ranges of similar size.
+
+            The first and the last range are open ended, so together the
+            ranges cover every possible `_id` of the type used in the
+            collection. Collections mixing `_id` types are not supported,
+            since MongoDB compares `$gte`/`$lt` only within one BSON type. """
+        pipeline = []
+        if query_filter:
+            pipeline.append({'$match': query_filter})
+        pipeline.append({'$bucketAuto': {'groupBy': '$_id',
+                                         'buckets': max(num_of_ranges, 1)}})
+
+        buckets = list(self._collection.aggregate(pipeline,
+                                                  allowDiskUse=True))
+        bounds = [bucket['_id']['min'] for bucket in buckets[1:]]
+
+        return [IdRange(lower=lower, upper=upper)
+                for lower, upper in zip([None] + bounds, bounds + [None])]
+
+    def _find_partitioned(
+            self,
+            query_filter: Dict = None,
+            projection: Union[Dict[str, bool], List[str]] = None,
+            num_of_processes: int = NUM_OF_PROCESSES,
+            ring_capacity: int = RING_CAPACITY
+    ) -> Generator[Dict, None, None]:
+        """ Workers send raw BSON through a shared memory ring each, which
+            holds at most `ring_capacity` bytes, and documents are decoded
+            here. """
+        id_ranges = self.id_ranges(query_filter=query_filter,
+                                   num_of_ranges=num_of_processes)
 
         with spawn_scope():
-            queue = Queue(maxsize=100)
-            processes = []
-
-            for sort_limit in sorts_limits:
-                p = Process(
-                    target=self._find_parallel,
-                    args=(queue,
-                          self._collection.name,
-                          {},
-                          projection,
-                          sort_limit.limit,
-                          sort_limit.skip,
-                          [(sort_limit.sort_field, sort_limit.sort_direction)]),
-                )
-                p.start()
-                processes.append(p)
-
-            workers_done = 0
-            while workers_done != num_of_processes:
-                chunk = queue.get()
-                if chunk != 'DONE':
-                    yield from chunk
-                else:
-                    workers_done += 1
-
-            for process in processes:
-                process.terminate()
+            condition = multiprocessing.Condition()
+            processes = {}
+
+            try:
+                for id_range in id_ranges:
+                    ring = SharedRing(capacity=ring_capacity,
+                                      condition=condition)
+                    p = Process(
+                        target=self._find_parallel,
+                        args=(ring,
+                              self._collection.name,
+                              self._collection.database.name,
+                              id_range.query_filter(query_filter),
+                              projection),
+                    )
+                    processes[ring] = p
+                    p.start()
+
+                live_rings = list(processes)
+                while live_rings:
+                    ring = wait_readable(live_rings, condition, timeout=1)
+                    if ring is None:
+                        _check_workers(processes[r] for r in live_rings)
+                        continue
+
+                    frame = ring.get(producer=processes[ring])
+                    if frame is None:
+                        live_rings.remove(ring)
+                    else:
+                        yield from decode_all(frame)
+            finally:
+                for ring, process in processes.items():
+                    if process.is_alive():
+                        process.terminate()
+                    process.join()
+                    ring.unlink()
 
     @staticmethod
-    def _find_parallel(queue: Queue,
+    def _find_parallel(ring: SharedRing,
                        _collection: str,
+                       _db: str,
                        query_filter: Dict = None,
-                       projection: Union[Dict[str, bool], List[str]] = None,
-                       limit: int = 0,
-                       skip: int = 0,
-                       sort: List[Tuple] = None):
-        from mongo_odm.repos.repos import MongoRepos
-
-        _query = MongoRepos.repo(_collection).find(query_filter=query_filter,
-                                                   projection=projection,
-                                                   limit=limit,
-                                                   skip=skip,
-                                                   sort=sort)
-        for chunk in chunks(_query, n=1000):
-            queue.put(list(chunk))
-
-        queue.put('DONE')
+                       projection: Union[Dict[str, bool], List[str]] = None):
+        """ Puts the raw BSON of matching documents into `ring`, concatenated
+            in frames of up to 1000 documents. The scan is forced onto the
+            `_id` index, so that it only visits its own `_id` range. """
+        try:
+            _query = MongoDocRepo(_collection, _db).find(
+                query_filter=query_filter,
+                projection=projection,
+                raw_bson=True,
+                hint=[('_id', ASCENDING)])
+            for chunk in chunks(_query, n=1000):
+                ring.put(b''.join(doc.raw for doc in chunk))
+        except Exception as e:
+            ring.put_error(e)
+        finally:
+            ring.close()
 
     def find(self,
              query_filter: Dict = None,
@@ -157,18 +337,37 @@ class MongoDocRepo(object):
              sort: List[Tuple] = None,
              projection: Union[Projection, Dict[str, bool], List[str]] = None,
              batch_size: int = 100,
+             raw_bson: bool = False,
+             prefetch: int = 0,
+             hint: List[Tuple] = None,
              print_progress: bool = False,
              print_step: int = 1000) -> Generator[Dict, None, None]:
+        """ With `raw_bson` documents are yielded as undecoded
+            RawBSONDocuments. With `prefetch` a background thread reads up
+            to that many batches ahead of the caller. `hint` forces the
+            index the query uses. """
         if projection and isinstance(projection, Projection):
             projection = projection.projection()
 
-        _query = self._collection.find(filter=query_filter,
-                                       limit=limit,
-                                       skip=skip,
-                                       sort=sort,
-                                       projection=projection,
-                                       batch_size=batch_size,
-                                       max_time_ms=max_time_ms)
+        _collection = self._raw_collection() if raw_bson else self._collection
+        _query = _collection.find(filter=query_filter,
+                                  limit=limit,
+                                  skip=skip,
+                                  sort=sort,
+                                  projection=projection,
+                                  batch_size=batch_size,
+                                  max_time_ms=max_time_ms,
+                                  hint=hint)
+        if self.shape_recorder is not None:
+            _query = self.shape_recorder.timed(self._collection.name,
+                                               'find',
+                                               query_filter,
+                                               sort,
+                                               _query)
+        if prefetch:
+            _query = prefetched(_query,
+                                num_of_batches=prefetch,
+                                batch_size=batch_size)
 
         count = self._collection.count_documents(
             filter=query_filter,
@@ -185,28 +384,206 @@ class MongoDocRepo(object):
 
         yield from _query
 
+    def find_by_ids(self,
+                    ids: Iterable[Any],
+                    projection: Union[Projection, Dict[str, bool],
+                                      List[str]] = None,
+                    chunk_size: int = BULK_CHUNK_SIZE,
+                    max_workers: int = 1,
+                    as_dict: bool = False,
+                    raw_bson: bool = False) -> IdLookup:
+        """ Documents with the given ids, fetched with one `$in` query per
+            `chunk_size` distinct ids, up to `max_workers` of them at a
+            time. Found documents are returned in the order of `ids`, or by
+            id if `as_dict` is set; duplicate ids are looked up once. """
+        ids = list(dict.fromkeys(ids))
+        if isinstance(projection, Projection):
+            projection = projection.projection()
+        if isinstance(projection, dict):
+            projection = {**projection, '_id': True}
+
+        def fetch(chunk: List[Any]) -> List[Dict]:
+            return list(self.find({'_id': {'$in': chunk}},
+                                  projection=projection,
+                                  batch_size=len(chunk),
+                                  raw_bson=raw_bson))
+
+        _chunks = list(chunks(ids, n=chunk_size))
+        if max_workers <= 1 or len(_chunks) <= 1:
+            fetched = map(fetch, _chunks)
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                fetched = list(executor.map(fetch, _chunks))
+
+        by_id = {doc['_id']: doc for docs in fetched for doc in docs}
+        found = by_id if as_dict else [by_id[_id] for _id in ids
+                                       if _id in by_id]
+        return IdLookup(found=found,
+                        missing=[_id for _id in ids if _id not in by_id])
+
+    def find_columns(self,
+                     fields: List[str],
+                     query_filter: Dict = None,
+                     dtypes: Dict[str, str] = None,
+                     arrow: bool = False,
+                     batch_size: int = 1000) -> Any:
+        """ Values of `fields`, which may be dotted paths, of the documents
+            matching `query_filter` as a dict of numpy arrays by field, or as
+            a pyarrow RecordBatch if `arrow` is set. `dtypes` are numpy dtype
+            names by field; fields without one hold Python objects.
+
+            Only `fields` are fetched, as raw BSON, so documents are never
+            decoded as a whole. Needs numpy, or pyarrow for `arrow`. """
+        return columns(self._projected_raw(fields, query_filter, batch_size),
+                       fields=fields,
+                       dtypes=dtypes,
+                       arrow=arrow)
+
+    def iter_columns(self,
+                     fields: List[str],
+                     query_filter: Dict = None,
+                     dtypes: Dict[str, str] = None,
+                     arrow: bool = False,
+                     chunk_size: int = 100000,
+                     batch_size: int = 1000) -> Generator[Any, None, None]:
+        """ Like `find_columns`, but yields the columns of every `chunk_size`
+            documents, so a large scan never has to fit in memory. """
+        for chunk in chunks(self._projected_raw(fields, query_filter,
+                                                batch_size),
+                            n=chunk_size):
+            yield columns(chunk, fields=fields, dtypes=dtypes, arrow=arrow)
+
+    def _projected_raw(self,
+                       fields: List[str],
+                       query_filter: Dict,
+                       batch_size: int) -> Generator[Dict, None, None]:
+        return self.find(query_filter=query_filter,
+                         projection=columns_projection(fields),
+                         batch_size=batch_size,
+                         raw_bson=True)
+
+    def paginate(
+            self,
+            query_filter: Dict = None,
+            page_size: int = 100,
+            sort: List[Tuple] = None,
+            projection: Union[Projection, Dict[str, bool], List[str]] = None,
+            token: str = None,
+            max_time_ms: Optional[int] = None) -> Page:
+        """ Returns the page of documents following `token` using keyset
+            pagination: instead of skipping documents, the next page starts
+            after the sort key of the last document of the previous one, so
+            every page costs the same. `_id` is appended to `sort` as a tie
+            breaker. Sort fields should be present and non-null in every
+            document, since documents that can not be compared with the
+            last seen key would be skipped. """
+        sort = _keyset_sort(sort)
+        if token:
+            seek_filter = _seek_filter(sort, decode_page_token(token))
+            query_filter = ({'$and': [query_filter, seek_filter]}
+                            if query_filter else seek_filter)
+
+        docs = list(self._collection.find(
+            filter=query_filter,
+            sort=sort,
+            projection=_keyset_projection(projection, sort),
+            limit=page_size,
+            max_time_ms=max_time_ms))
+
+        next_token = None
+        if len(docs) == page_size:
+            next_token = encode_page_token([_field_value(docs[-1], field)
+                                            for field, _ in sort])
+        return Page(docs=docs, next_token=next_token)
+
+    def iter_pages(
+            self,
+            query_filter: Dict = None,
+            page_size: int = 100,
+            sort: List[Tuple] = None,
+            projection: Union[Projection, Dict[str, bool], List[str]] = None,
+            token: str = None,
+            max_time_ms: Optional[int] = None
+    ) -> Generator[Page, None, None]:
+        """ Yields consecutive non-empty pages, starting after `token`. The
+            `next_token` of any page can be stored to resume later. """
+        while True:
+            page = self.paginate(query_filter=query_filter,
+                                 page_size=page_size,
+                                 sort=sort,
+                                 projection=projection,
+                                 token=token,
+                                 max_time_ms=max_time_ms)
+            if page.docs:
+                yield page
+            if not page.next_token:
+                return
+            token = page.next_token
+
     def aggregate(self,
                   pipeline: List[Dict],
-                  batch_size: int = 100) -> Generator[Dict, None, None]:
-
-        _aggregate = self._collection.aggregate(pipeline,
-                                                batchSize=batch_size)
+                  batch_size: int = 100,
+                  prefetch: int = 0,
+                  raw_bson: bool = False) -> Generator[Dict, None, None]:
+        _collection = self._raw_collection() if raw_bson else self._collection
+        _aggregate = _collection.aggregate(pipeline, batchSize=batch_size)
+        if prefetch:
+            _aggregate = prefetched(_aggregate,
+                                    num_of_batches=prefetch,
+                                    batch_size=batch_size)
 
         yield from _aggregate
 
-    def find_one(self, query_filter: Dict) -> Optional[Dict]:
-        return self._collection.find_one(query_filter)
+    def find_one(self,
+                 query_filter: Dict,
+                 raw_bson: bool = False) -> Optional[Dict]:
+        if self.cache is None:
+            _collection = (self._raw_collection() if raw_bson
+                           else self._collection)
+            return self._timed_call('find_one', query_filter,
+                                    lambda: _collection.find_one(query_filter))
+
+        doc = self.cache.get(query_filter)
+        if doc is None:
+            doc = self._timed_call(
+                'find_one', query_filter,
+                lambda: self._raw_collection().find_one(query_filter))
+            if doc is None:
+                return None
+            self.cache.set(query_filter, doc)
+        return doc if raw_bson else decode(doc.raw)
+
+    def _timed_call(self,
+                    operation: str,
+                    query_filter: Optional[Dict],
+                    call: Callable[[], Any]) -> Any:
+        return timed_call(self.shape_recorder,
+                          self._collection.name,
+                          operation,
+                          query_filter,
+                          call)
+
+    def _invalidate(self, query_filter: Dict = None) -> None:
+        if self.cache is not None:
+            self.cache.invalidate(query_filter)
+
+    def _raw_collection(self) -> Collection:
+        return self._collection.with_options(
+            codec_options=RAW_BSON_CODEC_OPTIONS)
 
     def update_one(self, _id: str, update: Dict, upsert: bool = False) -> None:
         self._collection.update_one(
             {'_id': _id}, {'$set': update}, upsert=upsert)
+        self._invalidate({'_id': _id})
 
     def insert_one(self, doc: Dict) -> None:
-        self._collection.insert_one(doc)
+        self._collection.insert_one(_inflated(doc))
+        self._invalidate({'_id': doc.get('_id')})
 
     def replace_one(self, doc: Dict) -> None:
         self._collection.replace_one(filter={'_id': doc['_id']},
-                                     replacement=doc)
+                                     replacement=_inflated(doc))
+        self._invalidate({'_id': doc['_id']})
 
     def insert_or_replace_one(self, doc: Dict) -> None:
         try:
@@ -215,28 +592,153 @@ class MongoDocRepo(object):
             self.replace_one(doc)
 
     def bulk_insert(self,
-                    docs: Iterator[Dict]) -> Optional[BulkWriteResult]:
-        requests = [InsertOne(doc) for doc in docs]
-        if requests:
-            return self._collection.bulk_write(requests, ordered=False)
+                    docs: Iterator[Dict],
+                    chunk_size: int = BULK_CHUNK_SIZE,
+                    max_chunk_bytes: int = None,
+                    max_workers: int = 1) -> Optional[BulkWriteResult]:
+        return self._bulk_write_chunks(docs,
+                                       request=InsertOne,
+                                       chunk_size=chunk_size,
+                                       max_chunk_bytes=max_chunk_bytes,
+                                       max_workers=max_workers)
 
     def bulk_update(self,
-                    docs: Iterator[Dict]) -> Optional[BulkWriteResult]:
-        requests = []
-        for doc in docs:
-            requests.append(UpdateOne({'_id': doc['_id']},
-                                      {'$set': doc},
-                                      upsert=True))
+                    docs: Iterator[Dict],
+                    chunk_size: int = BULK_CHUNK_SIZE,
+                    max_chunk_bytes: int = None,
+                    max_workers: int = 1) -> Optional[BulkWriteResult]:
+        return self._bulk_write_chunks(docs,
+                                       request=_upsert_request,
+                                       chunk_size=chunk_size,
+                                       max_chunk_bytes=max_chunk_bytes,
+                                       max_workers=max_workers)
+
+    def bulk_write(self,
+                   requests: List[Any],
+                   ordered: bool = False) -> Optional[BulkWriteResult]:
+        """ Documents of `requests` that are LazyDocuments must be inflated
+            before the requests are built, as `_prepared` and
+            `_bulk_write_chunks` do. """
         if requests:
-            return self._collection.bulk_write(requests, ordered=False)
+            try:
+                return self._collection.bulk_write(requests, ordered=ordered)
+            finally:
+                self._invalidate()
+
+    def _bulk_write_chunks(
+            self,
+            docs: Iterator[Dict],
+            request: Callable[[Dict], Any],
+            chunk_size: int = BULK_CHUNK_SIZE,
+            max_chunk_bytes: int = None,
+            max_workers: int = 1,
+            target: Collection = None) -> Optional[BulkWriteResult]:
+        """ Consumes docs lazily and writes them as unordered bulk writes of
+            at most `chunk_size` documents (and `max_chunk_bytes` of BSON,
+            if set). With `max_workers` > 1 up to that many chunks are
+            written concurrently. Returns the merged result of all chunks,
+            or None if there was nothing to write.
+
+            Writes go to `target` instead of the repo's collection if it is
+            set, in which case the cache is left to the caller. """
+        results = BulkWriteResults()
+
+        def write(chunk: List[Dict]) -> BulkWriteResult:
+            if target is not None:
+                return target.bulk_write([request(doc) for doc in chunk],
+                                         ordered=False)
+            return self.bulk_write([request(doc) for doc in chunk])
+
+        _chunks = sized_chunks(map(_inflated, docs),
+                               n=chunk_size,
+                               max_bytes=max_chunk_bytes,
+                               sizeof=_bson_size)
+        offset = 0
+        if max_workers <= 1:
+            for chunk in _chunks:
+                results.add(write(chunk), offset=offset)
+                offset += len(chunk)
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                in_flight = deque()
+                for chunk in _chunks:
+                    if len(in_flight) >= max_workers:
+                        chunk_offset, future = in_flight.popleft()
+                        results.add(future.result(), offset=chunk_offset)
+                    in_flight.append((offset, executor.submit(write, chunk)))
+                    offset += len(chunk)
+                for chunk_offset, future in in_flight:
+                    results.add(future.result(), offset=chunk_offset)
+
+        return results.result()
+
+    def export_collection(self,
+                          directory: str,
+                          query_filter: Dict = None,
+                          compression: Optional[str] = GZIP,
+                          segment_bytes: int = SEGMENT_BYTES,
+                          batch_size: int = 1000) -> Dict:
+        """ Streams the documents matching `query_filter`, as raw BSON, to
+            segments of at most `segment_bytes` in the subdirectory of
+            `directory` named after the collection, compressed with
+            `compression` (gzip, zstd or None). Returns the manifest. """
+        return write_segments(self.find(query_filter=query_filter,
+                                        batch_size=batch_size,
+                                        raw_bson=True),
+                              directory=os.path.join(directory,
+                                                     self._collection_name),
+                              compression=compression,
+                              segment_bytes=segment_bytes)
+
+    def import_collection(self,
+                          directory: str,
+                          drop: bool = False,
+                          chunk_size: int = BULK_CHUNK_SIZE,
+                          max_chunk_bytes: int = None,
+                          max_workers: int = 1) -> int:
+        """ Inserts the documents exported to `directory` by
+            `export_collection` in unordered bulk writes, dropping the
+            collection first if `drop` is set. Returns the number of
+            documents inserted.
+
+            The configured indices of the collection are built once the
+            documents are loaded, which is much faster than updating them
+            with every insert; this only holds for a collection that does
+            not exist yet or is dropped. """
+        if self._collection_name in COLLECTIONS:
+            database = db(COLLECTIONS[self._collection_name].db)
+        else:
+            database = db(self._db_name)
+        target = database[self._collection_name]
+        if drop:
+            target.drop()
+
+        try:
+            result = self._bulk_write_chunks(
+                read_segments(os.path.join(directory,
+                                           self._collection_name)),
+                request=InsertOne,
+                chunk_size=chunk_size,
+                max_chunk_bytes=max_chunk_bytes,
+                max_workers=max_workers,
+                target=target)
+        finally:
+            self._invalidate()
+
+        if self._collection_name in COLLECTIONS:
+            sync_collection(database, self._collection_name)
+        return result.inserted_count if result else 0
 
     def delete_all(self, query_filter: Dict = None) -> None:
         if not query_filter:
             query_filter = {}
         self._collection.delete_many(query_filter)
+        self._invalidate()
 
     def delete_one(self, query_filter: Dict) -> DeleteResult:
-        return self._collection.delete_one(query_filter)
+        result = self._collection.delete_one(query_filter)
+        self._invalidate(query_filter)
+        return result
 
     def delete_by_id(self, _id: str) -> DeleteResult:
         return self.delete_one({'_id': _id})
@@ -251,12 +753,16 @@ class MongoDocRepo(object):
         return self.exists_one({'_id': _id})
 
     def distinct(self, key: str, query_filter: Dict) -> List[str]:
-        return list(self._collection.distinct(key, query_filter))
+        return list(self._timed_call(
+            'distinct', query_filter,
+            lambda: self._collection.distinct(key, query_filter)))
 
     def count(self, query_filter: Dict = None) -> int:
         if query_filter is None:
             query_filter = {}
-        return self._collection.count_documents(query_filter)
+        return self._timed_call(
+            'count', query_filter,
+            lambda: self._collection.count_documents(query_filter))
 
     def field_values(self,
                      field_name: str,
@@ -320,6 +826,72 @@ class MongoDocRepo(object):
                            n=batch_size))
 
 
+def _keyset_sort(sort: List[Tuple] = None) -> List[Tuple]:
+    sort = list(sort) if sort else []
+    if '_id' not in (field for field, _ in sort):
+        sort.append(('_id', ASCENDING))
+    return sort
+
+
+def _seek_filter(sort: List[Tuple], values: List[Any]) -> Dict:
+    """ Matches documents that come after `values` in `sort` order. """
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {previous_field: value
+                  for (previous_field, _), value in zip(sort[:i], values)}
+        clause[field] = {'$gt' if direction == ASCENDING else '$lt':
+                         values[i]}
+        clauses.append(clause)
+    return clauses[0] if len(clauses) == 1 else {'$or': clauses}
+
+
+def _keyset_projection(
+        projection: Union[Projection, Dict[str, bool], List[str]],
+        sort: List[Tuple]) -> Optional[Dict[str, bool]]:
+    """ Makes sure that the sort fields are returned. """
+    if not projection:
+        return None
+    if isinstance(projection, Projection):
+        projection = projection.projection()
+    elif isinstance(projection, list):
+        projection = {field: True for field in projection}
+    else:
+        projection = dict(projection)
+
+    sort_fields = [field for field, _ in sort]
+    if any(include for field, include in projection.items()
+           if field != '_id'):
+        projection.update({field: True for field in sort_fields})
+    else:
+        for field in sort_fields:
+            projection.pop(field, None)
+    return projection
+
+
+def _field_value(doc: Dict, path: str) -> Any:
+    value = doc
+    for field in path.split('.'):
+        value = value.get(field) if isinstance(value, dict) else None
+    return value
+
+
+def _check_workers(processes: Iterable[Process]) -> None:
+    for process in processes:
+        if process.exitcode is not None:
+            raise RuntimeError(f'{process.name} exited with code '
+                               f'{process.exitcode} before finishing')
+
+
+def _bson_size(doc: Dict) -> int:
+    return len(encode(doc))
+
+
+def _upsert_request(doc: Dict) -> UpdateOne:
+    return UpdateOne({'_id': doc['_id']},
+                     {'$set': doc},
+                     upsert=True)
+
+
 class MongoObjRepo(MongoDocRepo):
     """ This Mongo interface uses our Base models, but does not require the
         additional restrictions of a Pipeline Model.
@@ -332,6 +904,7 @@ class MongoObjRepo(MongoDocRepo):
                  _type: Type = BaseType) -> None:
         super().__init__(_collection, _db)
         self._type = _type
+        self._trusted_type = _trusted_type(_type)
 
     def all_objs(self,
                  num_of_processes: int = 1,
@@ -343,14 +916,13 @@ class MongoObjRepo(MongoDocRepo):
                               print_step=print_step)
 
     def insert_obj(self, doc: BaseType) -> None:
-        self.insert_one(doc.data_dict)
+        self.insert_one(_prepared(doc).data_dict)
 
     def delete_obj(self, doc: BaseType) -> None:
         self.delete_by_id(doc._id)
 
     def replace_obj(self, doc: BaseType) -> None:
-        self._collection.replace_one(filter={'_id': doc._id},
-                                     replacement=doc.data_dict)
+        self.replace_one(_prepared(doc).data_dict)
 
     def insert_or_replace_obj(self, doc: BaseType) -> None:
         try:
@@ -358,25 +930,179 @@ class MongoObjRepo(MongoDocRepo):
         except DuplicateKeyError:
             self.replace_obj(doc)
 
-    def query_by_id(self, _id: str) -> Optional[BaseType]:
-        return self.query_one({'_id': _id})
-
-    def query_one(self, query_filter: Dict) -> Optional[BaseType]:
-        json_dict = self.find_one(query_filter)
+    def sync_objs(self,
+                  docs: Iterable[BaseType],
+                  batch_size: int = BULK_CHUNK_SIZE) -> SyncResult:
+        """ Writes only the objects that are new or whose `_hash` differs
+            from the stored one. Per batch, the stored hashes are fetched
+            with one `$in` query and the writes are sent as one unordered
+            bulk write: inserts for new objects and replacements for changed
+            ones. Hashes are recomputed first, so that changes made in place
+            to nested objects are written too. Objects without a hash are
+            always replaced, and of objects repeating an `_id` within a
+            batch only the last one is written. """
+        inserted = updated = unchanged = 0
+        for batch in chunks(docs, n=batch_size):
+            for doc in batch:
+                if isinstance(doc, MongoBase):
+                    doc.check_hash_and_update()
+            json_dicts = _last_per_id(_prepared(doc).data_dict
+                                      for doc in batch)
+            ids = [json_dict['_id'] for json_dict in json_dicts
+                   if json_dict.get('_id') is not None]
+            stored = {stored['_id']: stored.get('_hash')
+                      for stored in self._collection.find(
+                          {'_id': {'$in': ids}},
+                          projection={'_hash': True})} if ids else {}
+
+            requests = []
+            for json_dict in json_dicts:
+                _id = json_dict.get('_id')
+                _hash = json_dict.get('_hash')
+                if _id is None or _id not in stored:
+                    requests.append(InsertOne(json_dict))
+                    inserted += 1
+                elif _hash is None or stored[_id] != _hash:
+                    requests.append(ReplaceOne({'_id': _id}, json_dict,
+                                               upsert=True))
+                    updated += 1
+                else:
+                    unchanged += 1
+            self.bulk_write(requests)
+
+        return SyncResult(inserted=inserted,
+                          updated=updated,
+                          unchanged=unchanged)
+
+    def update_obj(self, doc: MongoBase) -> None:
+        """ Sends only the fields that changed since `doc` was queried with
+            `track_changes` (or last saved), together with the refreshed
+            `_hash` and `updated_at`. """
+        doc.check_hash_and_update()
+        update = doc.changes()
+        if update:
+            self._collection.update_one({'_id': doc._id}, update)
+            self._invalidate({'_id': doc._id})
+        doc.mark_clean()
+
+    def save_obj(self, doc: BaseType) -> None:
+        """ Updates changed fields of tracked objects and inserts or replaces
+            whole documents otherwise. """
+        if isinstance(doc, MongoBase) and doc.is_tracked():
+            self.update_obj(doc)
+        else:
+            self.insert_or_replace_obj(doc)
+
+    def query_by_id(self,
+                    _id: str,
+                    track_changes: bool = False,
+                    verify_hash: bool = False,
+                    lazy: bool = False) -> Optional[BaseType]:
+        return self.query_one({'_id': _id},
+                              track_changes=track_changes,
+                              verify_hash=verify_hash,
+                              lazy=lazy)
+
+    def query_by_ids(self,
+                     ids: Iterable[Any],
+                     projection: Union[Dict[str, bool], List[str]] = None,
+                     chunk_size: int = BULK_CHUNK_SIZE,
+                     max_workers: int = 1,
+                     as_dict: bool = False,
+                     track_changes: bool = False,
+                     verify_hash: bool = False,
+                     lazy: bool = False) -> IdLookup:
+        """ Models of the documents with the given ids, looked up as by
+            `find_by_ids`. """
+        lookup = self.find_by_ids(ids,
+                                  projection=projection,
+                                  chunk_size=chunk_size,
+                                  max_workers=max_workers,
+                                  as_dict=as_dict,
+                                  raw_bson=lazy)
+        model_type = self._model_type(verify_hash)
+
+        def model(json_dict: Dict) -> BaseType:
+            _model = model_type(LazyDocument(json_dict) if lazy
+                                else json_dict)
+            return _tracked(_model) if track_changes else _model
+
+        if as_dict:
+            found = {_id: model(json_dict)
+                     for _id, json_dict in lookup.found.items()}
+        else:
+            found = [model(json_dict) for json_dict in lookup.found]
+        return IdLookup(found=found, missing=lookup.missing)
+
+    def populate(self,
+                 models: Iterable[BaseType],
+                 field: str,
+                 batch_size: int = BULK_CHUNK_SIZE,
+                 attribute: str = None) -> Generator[BaseType, None, None]:
+        """ Yields `models` with the objects referenced at the dotted
+            `field` path attached as a list, in the order of the references
+            and with None for those not found, to `attribute`, which
+            defaults to `populated_` followed by the path.
+
+            The referenced collection is the `relations_with` of the type
+            at `field`. Its documents are fetched with one query per
+            `batch_size` models and matched by `_id` or identifiers. """
+        # Imported here, as repos imports this module.
+        from mongo_odm.repos.repos import MongoRepos
+        related = MongoRepos.repo(relation(self._type, field))
+        attribute = attribute or f'populated_{field.replace(".", "_")}'
+
+        for batch in chunks(models, n=batch_size):
+            _references = [references(model.data_dict, field)
+                           for model in batch]
+            query_filter = relation_filter(
+                [reference for model_references in _references
+                 for reference in model_references])
+            by_key = {}
+            if query_filter:
+                for related_model in related.query(query_filter,
+                                                   batch_size=batch_size):
+                    for key in reference_keys(related_model.data_dict):
+                        by_key.setdefault(key, related_model)
+
+            for model, model_references in zip(batch, _references):
+                # Set on the instance only, so that it is neither a field
+                # nor a change to the hash.
+                object.__setattr__(model, attribute,
+                                   [resolved(reference, by_key)
+                                    for reference in model_references])
+                yield model
+
+    def query_one(self,
+                  query_filter: Dict,
+                  track_changes: bool = False,
+                  verify_hash: bool = False,
+                  lazy: bool = False) -> Optional[BaseType]:
+        json_dict = self.find_one(query_filter, raw_bson=lazy)
         if json_dict:
-            return self._type(json_dict)
+            if lazy:
+                json_dict = LazyDocument(json_dict)
+            model = self._model_type(verify_hash)(json_dict)
+            return _tracked(model) if track_changes else model
 
     def query_aggregate(
             self,
             pipeline: List[Dict],
             num_of_processes: int = 1,
-            batch_size: int = 100) -> Generator[BaseType, None, None]:
+            batch_size: int = 100,
+            verify_hash: bool = False,
+            prefetch: int = 0,
+            ordered: bool = False) -> Generator[BaseType, None, None]:
         _query = self.aggregate(pipeline,
-                                batch_size=batch_size)
+                                batch_size=batch_size,
+                                prefetch=prefetch,
+                                raw_bson=num_of_processes > 1)
 
         yield from self._models_from_json_dicts(
             json_dicts=_query,
-            num_of_processes=num_of_processes)
+            num_of_processes=num_of_processes,
+            verify_hash=verify_hash,
+            ordered=ordered)
 
     def query(self,
               query_filter: Dict = None,
@@ -387,8 +1113,25 @@ class MongoObjRepo(MongoDocRepo):
               projection: Union[Dict[str, bool], List[str]] = None,
               batch_size: int = 100,
               num_of_processes: int = 1,
+              track_changes: bool = False,
+              verify_hash: bool = False,
+              lazy: bool = False,
+              prefetch: int = 0,
+              ordered: bool = False,
               print_progress: bool = False,
               print_step: int = 1000) -> Generator[BaseType, None, None]:
+        """ With `lazy` documents are read as raw BSON and each model field
+            is decoded only when it is first accessed, which cannot be
+            combined with `num_of_processes`.
+
+            With `num_of_processes` models are built by a shared pool of
+            worker processes and, unless `ordered` is set, yielded in the
+            order the workers finish them. The pool pays off only with
+            `verify_hash` on several cores; trusted models are cheaper to
+            build here than to send to workers. """
+        if lazy and num_of_processes > 1:
+            raise ValueError('lazy cannot be combined with num_of_processes')
+
         _query = self.find(query_filter=query_filter,
                            limit=limit,
                            max_time_ms=max_time_ms,
@@ -396,26 +1139,86 @@ class MongoObjRepo(MongoDocRepo):
                            sort=sort,
                            projection=projection,
                            batch_size=batch_size,
+                           raw_bson=lazy or num_of_processes > 1,
+                           prefetch=prefetch,
                            print_progress=print_progress,
                            print_step=print_step)
+        if lazy:
+            _query = map(LazyDocument, _query)
 
         yield from self._models_from_json_dicts(
             json_dicts=_query,
-            num_of_processes=num_of_processes)
+            num_of_processes=num_of_processes,
+            track_changes=track_changes,
+            verify_hash=verify_hash,
+            ordered=ordered)
+
+    def _model_type(self, verify_hash: bool = False) -> Callable:
+        """ Documents are hydrated trusting their stored `_hash`, unless
+            `verify_hash` asks for it to be recomputed on load. """
+        return self._type if verify_hash else self._trusted_type
 
     def _models_from_json_dicts(
             self,
             json_dicts: Iterator[Dict],
-            num_of_processes: int = 1) -> Generator[BaseType, None, None]:
+            num_of_processes: int = 1,
+            track_changes: bool = False,
+            verify_hash: bool = False,
+            ordered: bool = False) -> Generator[BaseType, None, None]:
+        model_type = self._model_type(verify_hash)
 
         if num_of_processes == 1:
-            yield from map(self._type, json_dicts)
+            models = map(model_type, json_dicts)
+        else:
+            json_dicts = hydration_pool(num_of_processes).hydrate(
+                model_type, json_dicts, ordered=ordered)
+            models = map(self._trusted_type, json_dicts)
+
+        if track_changes:
+            models = map(_tracked, models)
+
+        yield from models
+
+
+def _trusted_type(_type: Type) -> Callable[[Dict], BaseType]:
+    if isinstance(_type, type) and issubclass(_type, MongoBase):
+        return partial(_type, trusted=True)
+    return _type
+
+
+def _prepared(model: BaseType) -> BaseType:
+    """ Brings a model into a state in which it can be written. """
+    if isinstance(model, MongoBase):
+        model.ensure_hash()
+    _inflated(model.data_dict)
+    return model
+
+
+def _last_per_id(json_dicts: Iterable[Dict]) -> List[Dict]:
+    """ `json_dicts` without those followed by another with the same `_id`.
+        """
+    by_id, unkeyed = {}, []
+    for json_dict in json_dicts:
+        if json_dict.get('_id') is None:
+            unkeyed.append(json_dict)
         else:
-            with multiprocessing.Pool(processes=num_of_processes) as p:
-                for json_dict_chunk in chunks(json_dicts, 100000):
-                    yield from p.imap_unordered(self._type,
-                                                json_dict_chunk,
-                                                1000)
+            by_id.pop(json_dict['_id'], None)
+            by_id[json_dict['_id']] = json_dict
+    return list(by_id.values()) + unkeyed
+
+
+def _inflated(doc: Any) -> Any:
+    """ Decodes every field of a LazyDocument, since `bson.encode` reads
+        the dict storage directly and would miss fields not read yet. """
+    if isinstance(doc, LazyDocument):
+        doc.inflate()
+    return doc
+
+
+def _tracked(model: BaseType) -> BaseType:
+    if isinstance(model, MongoBase):
+        model.mark_clean()
+    return model
 
 
 class MongoRepo(MongoObjRepo):
@@ -0,0 +1,153 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo.errors import BulkWriteError
+from pymongo.operations import DeleteOne, InsertOne, ReplaceOne
+from pymongo.results import BulkWriteResult
+
+from mongo_odm.repos.repo import _prepared, BaseType
+from mongo_odm.repos.repos import MongoRepos
+
+INSERT = 'insert'
+REPLACE = 'replace'
+UPSERT = 'upsert'
+DELETE = 'delete'
+
+# Operation that results from queueing the second operation on an object
+# that already has the first one queued. A second insert is missing, as it
+# has to fail like it would in the database. An insert followed by a delete
+# still deletes, since a document with the `_id` may already be stored.
+_MERGED_OPERATIONS = {(INSERT, REPLACE): INSERT,
+                      (INSERT, DELETE): DELETE,
+                      (REPLACE, INSERT): UPSERT,
+                      (REPLACE, REPLACE): REPLACE,
+                      (REPLACE, DELETE): DELETE,
+                      (UPSERT, INSERT): UPSERT,
+                      (UPSERT, REPLACE): UPSERT,
+                      (UPSERT, DELETE): DELETE,
+                      (DELETE, INSERT): UPSERT,
+                      (DELETE, REPLACE): DELETE,
+                      (DELETE, DELETE): DELETE}
+
+
+class UnitOfWork(object):
+    """ Identity map and write queue on top of MongoRepos.
+
+        Objects loaded through the unit of work are kept by collection and
+        `_id`, so repeated lookups are served from memory and return the
+        same instance. Inserts, replaces and deletes are queued, merged per
+        object, and sent on `commit` as one bulk write per collection.
+
+        Queueing an insert for an `_id` that already has one queued raises
+        ValueError. Used as a context manager it commits on a clean exit and
+        discards queued writes when an exception is raised. """
+
+    def __init__(self, ordered: bool = False) -> None:
+        self._ordered = ordered
+        self._identity_map: Dict[Tuple[str, Any], Optional[BaseType]] = {}
+        self._pending: Dict[str, Dict[Tuple, Tuple[str, BaseType]]] = {}
+
+    def __enter__(self) -> 'UnitOfWork':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+    def query_by_id(self, collection: str, _id: Any) -> Optional[BaseType]:
+        key = (collection, _id)
+        if key not in self._identity_map:
+            self._identity_map[key] = MongoRepos.repo(
+                collection).query_by_id(_id)
+        return self._identity_map[key]
+
+    def query_one(self,
+                  collection: str,
+                  query_filter: Dict) -> Optional[BaseType]:
+        """ Always queries the database, but returns the instance already in
+            the identity map if the document was loaded before. """
+        obj = MongoRepos.repo(collection).query_one(query_filter)
+        if obj is None:
+            return None
+        return self._identity_map.setdefault((collection, obj._id), obj)
+
+    def insert(self, collection: str, obj: BaseType) -> None:
+        self._queue(collection, INSERT, obj)
+
+    def replace(self, collection: str, obj: BaseType) -> None:
+        self._queue(collection, REPLACE, obj)
+
+    def delete(self, collection: str, obj: BaseType) -> None:
+        self._queue(collection, DELETE, obj)
+
+    def _queue(self, collection: str, operation: str, obj: BaseType) -> None:
+        _id = obj.data_dict.get('_id')
+        key = ('_id', _id) if _id is not None else ('object', id(obj))
+
+        pending = self._pending.setdefault(collection, {})
+        if key in pending:
+            merged = (pending[key][0], operation)
+            if merged not in _MERGED_OPERATIONS:
+                raise ValueError(f'[_id: {_id}] is already queued for '
+                                 f'insert into [Collection: {collection}]')
+            operation = _MERGED_OPERATIONS[merged]
+        # Merged operations keep the position of the first one, which
+        # matters for ordered writes.
+        pending[key] = (operation, obj)
+
+        if _id is not None:
+            self._identity_map[(collection, _id)] = (
+                None if operation == DELETE else obj)
+
+    def commit(self) -> Dict[str, BulkWriteResult]:
+        """ Writes queued operations, one bulk write per collection. If a
+            bulk write fails, writes queued for the remaining collections
+            stay pending, and so do those of its collection that were not
+            applied. """
+        results = {}
+        while self._pending:
+            collection = next(iter(self._pending))
+            pending = self._pending[collection]
+            requests = [_request(operation, _prepared(obj))
+                        for operation, obj in pending.values()]
+            try:
+                result = MongoRepos.repo(collection).bulk_write(
+                    requests, ordered=self._ordered)
+            except BulkWriteError as e:
+                keys = list(pending)
+                self._pending[collection] = {
+                    keys[index]: pending[keys[index]]
+                    for index in _not_applied(e.details, len(keys),
+                                              self._ordered)}
+                raise
+            del self._pending[collection]
+            if result:
+                results[collection] = result
+        return results
+
+    def rollback(self) -> None:
+        """ Discards queued writes and forgets loaded objects, which may have
+            been changed in memory. """
+        self._pending.clear()
+        self._identity_map.clear()
+
+
+def _not_applied(details: Dict, count: int, ordered: bool) -> List[int]:
+    """ Indexes of the requests of a failed bulk write of `count` requests
+        that were not applied, going by the `details` of its error. """
+    failed = sorted({error['index']
+                     for error in details.get('writeErrors', [])})
+    if ordered and failed:
+        return list(range(failed[0], count))
+    return failed
+
+
+def _request(operation: str, obj: BaseType) -> Any:
+    if operation == INSERT:
+        return InsertOne(obj.data_dict)
+    elif operation == DELETE:
+        return DeleteOne({'_id': obj._id})
+    return ReplaceOne({'_id': obj._id},
+                      obj.data_dict,
+                      upsert=operation == UPSERT)
@@ -1 +1,11 @@
-from mongo_odm.session.session import collection, db, MONGO_CLIENT
+from mongo_odm.session.async_session import (async_client, async_collection,
+                                             async_db, close_async_clients)
+from mongo_odm.session.session import client, collection, db
+from mongo_odm.session.metrics import (metrics, prometheus_text,
+                                       reset_metrics, serve_metrics)
+
+
+def __getattr__(name: str):
+    if name == 'MONGO_CLIENT':
+        return client()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,45 @@
+import asyncio
+from weakref import WeakKeyDictionary
+
+from pymongo import AsyncMongoClient
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.asynchronous.database import AsyncDatabase
+
+from mongo_odm.config.config import client_options, COLLECTIONS
+from mongo_odm.session.session import client_params, INDEX_SYNC
+
+# AsyncMongoClient is bound to the event loop it is first used in,
+# so every running loop gets its own client.
+_ASYNC_CLIENTS: WeakKeyDictionary = WeakKeyDictionary()
+
+
+def async_client(db_name: str = None) -> AsyncMongoClient:
+    """ The client of the running loop for the pool options of the database
+        `db_name`. """
+    options = client_options(db_name)
+    clients = _ASYNC_CLIENTS.setdefault(asyncio.get_running_loop(), {})
+    if options not in clients:
+        clients[options] = AsyncMongoClient(**client_params(db_name))
+    return clients[options]
+
+
+async def close_async_clients() -> None:
+    """ Closes the clients of the running loop. Call it before the loop
+        ends, e.g. at the end of the coroutine passed to `asyncio.run`, as
+        a client can only be closed in its own loop. """
+    clients = _ASYNC_CLIENTS.pop(asyncio.get_running_loop(), {})
+    for _client in clients.values():
+        await _client.close()
+
+
+def async_db(name: str) -> AsyncDatabase:
+    return async_client(name)[name]
+
+
+async def async_collection(_collection: str) -> AsyncCollection:
+    """ The configured collection, synced like `session.collection` does,
+        on a worker thread, the first time its database is used. """
+    _coll = COLLECTIONS[_collection]
+    if not INDEX_SYNC.is_synced(_coll.db):
+        await asyncio.to_thread(INDEX_SYNC.ensure, _collection)
+    return async_db(name=_coll.db)[_collection]
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, NamedTuple, Set
+
+from pymongo import IndexModel
+from pymongo.database import Database
+from pymongo.errors import CollectionInvalid
+
+from mongo_odm.config.config import COLLECTIONS
+
+EAGER = 'eager'
+BACKGROUND = 'background'
+OFF = 'off'
+SYNC_MODES = (EAGER, BACKGROUND, OFF)
+
+META_COLLECTION = 'mongo_odm_meta'
+FINGERPRINT_ID = 'index_sync'
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class IndexDiff(NamedTuple):
+    """ Index names configured but not in the database, in the database but
+        not configured, and present in both with different keys or
+        options. """
+    missing: List[str]
+    extra: List[str]
+    changed: List[str]
+
+
+class IndexSync(object):
+    """ Creates configured collections and indices once per process and
+        database, instead of checking them whenever a repo is built.
+
+        A fingerprint of the configuration of a database is stored in its
+        META_COLLECTION collection. If it matches, syncing the database takes
+        a single query; otherwise every collection gets one
+        `create_indexes` call and the fingerprint is updated. Indices
+        dropped by hand are therefore not recreated until the configuration
+        changes or `sync_all(force=True)` is called.
+
+        In the BACKGROUND mode the first `ensure` starts syncing every
+        database in a daemon thread and returns at once, so writes made
+        before it finishes may not be checked by unique indices yet. OFF
+        leaves the database alone. """
+
+    def __init__(self,
+                 db: Callable[[str], Database],
+                 mode: str = EAGER) -> None:
+        if mode not in SYNC_MODES:
+            raise ValueError(f'Index sync mode must be one of {SYNC_MODES}, '
+                             f'not {mode!r}')
+        self.mode = mode
+        self._db = db
+        self._synced: Set[str] = set()
+        self._lock = threading.RLock()
+        # Guards only the start of the BACKGROUND thread, since `_lock` is
+        # held by that thread for as long as it syncs.
+        self._thread_lock = threading.Lock()
+        self._thread = None
+
+    def is_synced(self, db_name: str) -> bool:
+        return self.mode == OFF or db_name in self._synced
+
+    def ensure(self, _collection: str) -> None:
+        db_name = COLLECTIONS[_collection].db
+        if self.is_synced(db_name):
+            return
+        if self.mode == BACKGROUND:
+            self._start_background()
+        else:
+            self.sync_db(db_name)
+
+    def sync_all(self, force: bool = False) -> None:
+        for db_name in sorted({_coll.db for _coll in COLLECTIONS.values()}):
+            self.sync_db(db_name, force=force)
+
+    def sync_db(self, db_name: str, force: bool = False) -> None:
+        with self._lock:
+            if db_name in self._synced and not force:
+                return
+
+            names = [name for name, _coll in COLLECTIONS.items()
+                     if _coll.db == db_name]
+            _fingerprint = fingerprint(names)
+            database = self._db(db_name)
+            meta = database[META_COLLECTION]
+
+            stored = meta.find_one({'_id': FINGERPRINT_ID}) or {}
+            if force or stored.get('fingerprint') != _fingerprint:
+                for name in names:
+                    sync_collection(database, name)
+                meta.replace_one({'_id': FINGERPRINT_ID},
+                                 {'fingerprint': _fingerprint,
+                                  'synced_at': datetime.now(timezone.utc)},
+                                 upsert=True)
+
+            self._synced.add(db_name)
+
+    def diff(self, _collection: str) -> IndexDiff:
+        live = self._db(COLLECTIONS[_collection].db)[
+            _collection].index_information()
+        live.pop('_id_', None)
+        configured = {model.document['name']: _spec(model)
+                      for model in index_models(_collection)}
+
+        return IndexDiff(
+            missing=sorted(set(configured) - set(live)),
+            extra=sorted(set(live) - set(configured)),
+            changed=sorted(name for name in set(configured) & set(live)
+                           if not _matches(configured[name], live[name])))
+
+    def reset(self) -> None:
+        """ Makes the next `ensure` sync again. """
+        with self._lock:
+            self._synced.clear()
+
+    def _start_background(self) -> None:
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sync_logged,
+                                                daemon=True)
+                self._thread.start()
+
+    def _sync_logged(self) -> None:
+        try:
+            self.sync_all()
+        except Exception:
+            _LOGGER.exception('Syncing collections and indices failed')
+
+
+def index_models(_collection: str) -> List[IndexModel]:
+    models = []
+    for index in COLLECTIONS[_collection].indices:
+        options = {'unique': index.unique}
+        if index.name:
+            options['name'] = index.name
+        if index.sparse:
+            options['sparse'] = True
+        for option, value in (
+                ('partialFilterExpression', index.partial_filter_expression),
+                ('expireAfterSeconds', index.expire_after_seconds),
+                ('collation', index.collation),
+                ('wildcardProjection', index.wildcard_projection)):
+            if value is not None:
+                options[option] = value
+        models.append(IndexModel(index.fields, **options))
+    return models
+
+
+def sync_collection(database: Database, _collection: str) -> None:
+    """ Creates the collection and its indices, in one round trip if it has
+        any, since creating an index creates its collection. """
+    models = index_models(_collection)
+    if models:
+        database[_collection].create_indexes(models)
+        return
+    try:
+        database.create_collection(_collection)
+    except CollectionInvalid:
+        pass
+
+
+def fingerprint(collections: List[str]) -> str:
+    config = [[name, [_spec(model) for model in index_models(name)]]
+              for name in sorted(collections)]
+    return hashlib.sha256(json.dumps(config,
+                                     sort_keys=True,
+                                     default=str).encode()).hexdigest()
+
+
+def _spec(model: IndexModel) -> Dict:
+    spec = dict(model.document)
+    spec['key'] = list(spec['key'].items())
+    return spec
+
+
+def _matches(configured: Dict, live: Dict) -> bool:
+    if _key(configured) != _key(live):
+        return False
+    for option in ('unique', 'sparse'):
+        if configured.get(option, False) != live.get(option, False):
+            return False
+    for option in ('partialFilterExpression', 'expireAfterSeconds',
+                   'wildcardProjection'):
+        if configured.get(option) != live.get(option):
+            return False
+    # The server fills in every collation option that was left out.
+    collation = live.get('collation', {})
+    return all(collation.get(option) == value
+               for option, value in configured.get('collation', {}).items())
+
+
+def _key(spec: Dict) -> List[List]:
+    """ Index key with text fields last and sorted, which is how they can
+        be compared with the `_fts` key and `weights` of a live text index.
+        """
+    key = [list(pair) for pair in spec['key']
+           if pair[0] not in ('_fts', '_ftsx')]
+    if any(pair[0] == '_fts' for pair in spec['key']):
+        key += [[field, 'text'] for field in spec.get('weights', {})]
+    text = sorted(pair for pair in key if pair[1] == 'text')
+    return [pair for pair in key if pair[1] != 'text'] + text
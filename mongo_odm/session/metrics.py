@@ -0,0 +1,323 @@
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Mapping, Tuple
+
+from bson import encode
+from bson.raw_bson import RawBSONDocument
+from pymongo import monitoring
+
+from mongo_odm.config.env_vars import MONGO_METRICS_BYTES
+
+LATENCY_BUCKETS: Tuple[float, ...] = (0.0005, 0.001, 0.0025, 0.005, 0.01,
+                                      0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                                      5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram(object):
+    """ Cumulative histogram with fixed upper bounds, as Prometheus has it.
+        Not thread safe on its own; the metrics holding it lock around it. """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self) -> Dict:
+        cumulative, total = [], 0
+        for count in self.counts:
+            total += count
+            cumulative.append(total)
+        return {'buckets': dict(zip(self.buckets + (float('inf'),),
+                                    cumulative)),
+                'sum': self.sum,
+                'count': self.count}
+
+
+class OperationStats(object):
+    def __init__(self) -> None:
+        self.latency = Histogram()
+        self.failures = 0
+        self.docs_returned = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def snapshot(self) -> Dict:
+        return {'latency': self.latency.snapshot(),
+                'failures': self.failures,
+                'docs_returned': self.docs_returned,
+                'bytes_sent': self.bytes_sent,
+                'bytes_received': self.bytes_received}
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """ Records latency, failures and documents returned per collection and
+        command, and with `count_bytes` also the BSON bytes sent and
+        received, which costs a second encoding of most commands and
+        replies. """
+
+    def __init__(self, count_bytes: bool = False) -> None:
+        self.count_bytes = count_bytes
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], OperationStats] = {}
+        self._started: Dict[Tuple, Tuple[str, int]] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        started = (_collection_name(event),
+                   _bson_size(event.command) if self.count_bytes else 0)
+        with self._lock:
+            self._started[_event_key(event)] = started
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        docs_returned = _docs_returned(event.reply)
+        bytes_received = (_bson_size(event.reply) if self.count_bytes
+                          else 0)
+        with self._lock:
+            stats = self._finished(event)
+            stats.docs_returned += docs_returned
+            stats.bytes_received += bytes_received
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        with self._lock:
+            self._finished(event).failures += 1
+
+    def _finished(self, event: monitoring._CommandEvent) -> OperationStats:
+        _collection, bytes_sent = self._started.pop(_event_key(event),
+                                                    ('', 0))
+        key = (event.database_name, _collection, event.command_name)
+        if key not in self._stats:
+            self._stats[key] = OperationStats()
+        stats = self._stats[key]
+        stats.latency.observe(event.duration_micros / 1e6)
+        stats.bytes_sent += bytes_sent
+        return stats
+
+    def snapshot(self) -> Dict[Tuple[str, str, str], Dict]:
+        """ Stats keyed by (database, collection, command). """
+        with self._lock:
+            return {key: stats.snapshot()
+                    for key, stats in self._stats.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """ Records how long operations wait to check a connection out of the
+        pool of each server, and how often they give up. """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._wait: Dict[str, Histogram] = {}
+        self._failures: Dict[str, int] = {}
+
+    def connection_checked_out(
+            self,
+            event: monitoring.ConnectionCheckedOutEvent) -> None:
+        self._observe(event.address, event.duration)
+
+    def connection_check_out_failed(
+            self,
+            event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        address = self._observe(event.address, event.duration)
+        with self._lock:
+            self._failures[address] = self._failures.get(address, 0) + 1
+
+    def _observe(self, address: Tuple[str, int], duration: float) -> str:
+        address = '%s:%s' % address
+        with self._lock:
+            if address not in self._wait:
+                self._wait[address] = Histogram()
+            self._wait[address].observe(duration)
+        return address
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """ Stats keyed by server address. """
+        with self._lock:
+            return {address: {'wait': histogram.snapshot(),
+                              'failures': self._failures.get(address, 0)}
+                    for address, histogram in self._wait.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._wait.clear()
+            self._failures.clear()
+
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        pass
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_created(self, event) -> None:
+        pass
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_closed(self, event) -> None:
+        pass
+
+    def connection_check_out_started(self, event) -> None:
+        pass
+
+    def connection_checked_in(self, event) -> None:
+        pass
+
+
+COMMAND_METRICS = CommandMetrics(count_bytes=MONGO_METRICS_BYTES)
+POOL_METRICS = PoolMetrics()
+
+
+def listeners() -> List[monitoring._EventListener]:
+    return [COMMAND_METRICS, POOL_METRICS]
+
+
+def metrics() -> Dict:
+    return {'commands': COMMAND_METRICS.snapshot(),
+            'pools': POOL_METRICS.snapshot()}
+
+
+def reset_metrics() -> None:
+    COMMAND_METRICS.reset()
+    POOL_METRICS.reset()
+
+
+def prometheus_text() -> str:
+    """ All metrics in the Prometheus text exposition format. """
+    lines = []
+    commands = COMMAND_METRICS.snapshot()
+    pools = POOL_METRICS.snapshot()
+
+    _histograms(lines,
+                'mongo_odm_command_duration_seconds',
+                'Duration of MongoDB commands.',
+                {_command_labels(key): stats['latency']
+                 for key, stats in commands.items()})
+    counters = [('mongo_odm_command_failures_total', 'failures',
+                 'MongoDB commands that failed.'),
+                ('mongo_odm_docs_returned_total', 'docs_returned',
+                 'Documents returned in cursor batches.')]
+    if COMMAND_METRICS.count_bytes:
+        counters += [('mongo_odm_bytes_sent_total', 'bytes_sent',
+                      'BSON bytes of commands sent.'),
+                     ('mongo_odm_bytes_received_total', 'bytes_received',
+                      'BSON bytes of replies received.')]
+    for name, field, help_text in counters:
+        _counters(lines, name, help_text,
+                  {_command_labels(key): stats[field]
+                   for key, stats in commands.items()})
+
+    _histograms(lines,
+                'mongo_odm_pool_wait_seconds',
+                'Time spent waiting to check a connection out of the pool.',
+                {_labels(address=address): stats['wait']
+                 for address, stats in pools.items()})
+    _counters(lines,
+              'mongo_odm_pool_checkout_failures_total',
+              'Connection check outs that failed.',
+              {_labels(address=address): stats['failures']
+               for address, stats in pools.items()})
+
+    return '\n'.join(lines) + '\n'
+
+
+def serve_metrics(port: int, host: str = '') -> ThreadingHTTPServer:
+    """ Serves `prometheus_text` over HTTP from a daemon thread. Call
+        `shutdown` on the returned server to stop it. """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', PROMETHEUS_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def _event_key(event: monitoring._CommandEvent) -> Tuple:
+    return event.connection_id, event.request_id, event.operation_id
+
+
+def _collection_name(event: monitoring.CommandStartedEvent) -> str:
+    command = event.command
+    if event.command_name == 'getMore':
+        return command.get('collection', '')
+    _collection = command.get(event.command_name)
+    return _collection if isinstance(_collection, str) else ''
+
+
+def _bson_size(doc: Mapping) -> int:
+    if isinstance(doc, RawBSONDocument):
+        return len(doc.raw)
+    return len(encode(doc))
+
+
+def _docs_returned(reply: Mapping) -> int:
+    cursor = reply.get('cursor')
+    if not cursor:
+        return 0
+    return len(cursor.get('firstBatch', cursor.get('nextBatch', [])))
+
+
+def _command_labels(key: Tuple[str, str, str]) -> str:
+    _db, _collection, command = key
+    return _labels(db=_db, collection=_collection, command=command)
+
+
+def _labels(**labels: str) -> str:
+    return ','.join(f'{name}="{_escaped(value)}"'
+                    for name, value in labels.items())
+
+
+def _escaped(value: str) -> str:
+    return (value.replace('\\', '\\\\')
+                 .replace('"', '\\"')
+                 .replace('\n', '\\n'))
+
+
+def _histograms(lines: List[str],
+                name: str,
+                help_text: str,
+                histograms: Dict[str, Dict]) -> None:
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for labels, histogram in histograms.items():
+        for bound, count in histogram['buckets'].items():
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'{name}_bucket{{{labels},le="{le}"}} {count}')
+        lines.append(f'{name}_sum{{{labels}}} {histogram["sum"]}')
+        lines.append(f'{name}_count{{{labels}}} {histogram["count"]}')
+
+
+def _counters(lines: List[str],
+              name: str,
+              help_text: str,
+              counters: Dict[str, int]) -> None:
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} counter')
+    for labels, value in counters.items():
+        lines.append(f'{name}{{{labels}}} {value}')
@@ -1,16 +1,23 @@
+import os
+import threading
+from typing import Any, Dict, Tuple
+
 from pymongo import MongoClient
 from pymongo.collection import Collection
 from pymongo.database import Database
+from pymongo.errors import CollectionInvalid
 
-from mongo_odm.config.config import COLLECTIONS
+from mongo_odm.config.config import client_options, ClientOptions, COLLECTIONS
 from mongo_odm.config.env_vars import (MONGO_CERT_PATH, MONGO_HOST,
-                                       MONGO_PASSWORD,
-                                       MONGO_PORT, MONGO_USERNAME,
-                                       MONGO_USE_REPLICA_SET, MONGO_USE_SSL)
+                                       MONGO_INDEX_SYNC, MONGO_METRICS,
+                                       MONGO_PASSWORD, MONGO_PORT,
+                                       MONGO_USERNAME, MONGO_USE_REPLICA_SET,
+                                       MONGO_USE_SSL)
+from mongo_odm.session.index_sync import index_models, IndexSync
+from mongo_odm.session.metrics import listeners
 
 MONGO_PARAMS = {'host': MONGO_HOST,
                 'port': MONGO_PORT,
-                'maxPoolSize': 5000,
                 'retryWrites': False}
 
 if MONGO_USERNAME:
@@ -24,40 +31,80 @@ if MONGO_USE_SSL:
 if MONGO_USE_REPLICA_SET:
     MONGO_PARAMS['replicaSet'] = 'rs0'
     MONGO_PARAMS['readPreference'] = 'secondaryPreferred'
+if MONGO_METRICS:
+    MONGO_PARAMS['event_listeners'] = listeners()
+
+# Clients by process id and pool options. pymongo clients must not be used
+# after a fork, so a child process creates its own instead of using those
+# inherited from its parent.
+_CLIENTS: Dict[Tuple[int, ClientOptions], MongoClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def client_params(db_name: str = None) -> Dict[str, Any]:
+    """ MongoClient keyword arguments for the database `db_name`. """
+    return {**MONGO_PARAMS, **client_options(db_name).params()}
+
+
+def client(db_name: str = None) -> MongoClient:
+    """ The client of this process for the pool options of the database
+        `db_name`, created on first use. Databases with the same options
+        share a client. """
+    options = client_options(db_name)
+    key = (os.getpid(), options)
+    if key not in _CLIENTS:
+        with _CLIENTS_LOCK:
+            if key not in _CLIENTS:
+                _CLIENTS[key] = MongoClient(**client_params(db_name))
+    return _CLIENTS[key]
+
+
+def _forget_inherited_clients() -> None:
+    # Closing them would end the sessions of the parent, so they are only
+    # dropped.
+    global _CLIENTS_LOCK
+    _CLIENTS.clear()
+    _CLIENTS_LOCK = threading.Lock()
+
 
-MONGO_CLIENT = MongoClient(**MONGO_PARAMS)
+os.register_at_fork(after_in_child=_forget_inherited_clients)
+
+
+def __getattr__(name: str):
+    # MONGO_CLIENT is kept as a module attribute for existing imports, but
+    # the client is only created when it is first accessed.
+    if name == 'MONGO_CLIENT':
+        return client()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 def db(name: str) -> Database:
-    return MONGO_CLIENT[name]
+    return client(name)[name]
+
+
+INDEX_SYNC = IndexSync(db, mode=MONGO_INDEX_SYNC)
 
 
 def collection(_collection: str) -> Collection:
-    _coll = COLLECTIONS[_collection]
-    _db = db(name=_coll.db)
-    if _collection not in _db.list_collection_names():
-        create_collection(_collection)
-    return _db[_collection]
+    """ The configured collection. Unless MONGO_INDEX_SYNC is off, the
+        collection and its indices are created the first time a collection
+        of its database is used in this process. """
+    INDEX_SYNC.ensure(_collection)
+    return db(name=COLLECTIONS[_collection].db)[_collection]
 
 
 def create_collection(_collection: str) -> None:
     _coll = COLLECTIONS[_collection]
     _db = db(name=_coll.db)
-    _db.create_collection(_collection)
+    try:
+        _db.create_collection(_collection)
+    except CollectionInvalid:
+        pass
     create_indices(_collection)
 
 
 def create_indices(_collection: str) -> None:
-    _coll = COLLECTIONS[_collection]
-    _db = db(name=_coll.db)
-    _indices = _coll.indices
+    _indices = index_models(_collection)
     if _indices:
-        coll = _db[_collection]
-        for index in _indices:
-            if index.name:
-                coll.create_index(index.fields,
-                                  unique=index.unique,
-                                  name=index.name)
-            else:
-                coll.create_index(index.fields,
-                                  unique=index.unique)
+        _coll = COLLECTIONS[_collection]
+        db(name=_coll.db)[_collection].create_indexes(_indices)
@@ -0,0 +1,77 @@
+""" Dumps configured collections to compressed BSON segments, or restores
+    them, one subdirectory of the dump directory per collection.
+
+    python -m mongo_odm.tools.dump export dump/ --compression zstd
+    python -m mongo_odm.tools.dump import dump/ --drop """
+import argparse
+import os
+from typing import List, Optional
+
+from mongo_odm.config.config import COLLECTIONS
+from mongo_odm.repos.repos import MongoRepos
+from mongo_odm.utils.bson_files import (COMPRESSIONS, GZIP, MANIFEST,
+                                        SEGMENT_BYTES)
+
+
+def export_all(directory: str,
+               collections: Optional[List[str]] = None,
+               compression: Optional[str] = GZIP,
+               segment_bytes: int = SEGMENT_BYTES) -> None:
+    for name in collections or COLLECTIONS:
+        manifest = MongoRepos.repo(name).export_collection(
+            directory,
+            compression=compression,
+            segment_bytes=segment_bytes)
+        print(f'Exported {manifest["count"]} documents of {name}')
+
+
+def import_all(directory: str,
+               collections: Optional[List[str]] = None,
+               drop: bool = False,
+               max_workers: int = 1) -> None:
+    """ Restores the collections dumped to `directory`, skipping those
+        without a dump. """
+    for name in collections or COLLECTIONS:
+        if not os.path.exists(os.path.join(directory, name, MANIFEST)):
+            continue
+        count = MongoRepos.repo(name).import_collection(
+            directory,
+            drop=drop,
+            max_workers=max_workers)
+        print(f'Imported {count} documents of {name}')
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = commands.add_parser('export')
+    export_parser.add_argument('directory')
+    export_parser.add_argument('--collections', nargs='+')
+    export_parser.add_argument('--compression', default=GZIP,
+                               choices=[c or 'none' for c in COMPRESSIONS])
+    export_parser.add_argument('--segment-mb', type=int,
+                               default=SEGMENT_BYTES // 2 ** 20)
+
+    import_parser = commands.add_parser('import')
+    import_parser.add_argument('directory')
+    import_parser.add_argument('--collections', nargs='+')
+    import_parser.add_argument('--drop', action='store_true')
+    import_parser.add_argument('--workers', type=int, default=1)
+
+    args = parser.parse_args(argv)
+    if args.command == 'export':
+        export_all(args.directory,
+                   collections=args.collections,
+                   compression=(None if args.compression == 'none'
+                                else args.compression),
+                   segment_bytes=args.segment_mb * 2 ** 20)
+    else:
+        import_all(args.directory,
+                   collections=args.collections,
+                   drop=args.drop,
+                   max_workers=args.workers)
+
+
+if __name__ == '__main__':
+    main()
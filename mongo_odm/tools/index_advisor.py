@@ -0,0 +1,237 @@
+""" Compares recorded query shapes with the indices configured for their
+    collections and suggests indices to add and to drop, in the yaml form of
+    the collection configuration.
+
+    python -m mongo_odm.tools.index_advisor shapes.json
+
+    where shapes.json was written by `QueryShapeRecorder.dump`. """
+import argparse
+import json
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+import yaml
+
+from mongo_odm.config.config import COLLECTIONS, Field, Index, ORDERS
+from mongo_odm.repos.query_shapes import (QueryShape, QueryShapeRecorder,
+                                          ShapeStats)
+
+# Operators that select one value, or a set of values, of a field and can
+# therefore be put before the sort fields in an index.
+EQUALITY_OPERATORS = {'$eq', '$in', '$elemMatch', '$all'}
+
+_ORDER_NAMES = {order: name for name, order in ORDERS.items()}
+
+
+class Predicate(NamedTuple):
+    """ Fields a query compares by equality and by range, and its sort. """
+    equality: Tuple[str, ...]
+    range: Tuple[str, ...]
+    sort: Tuple[Tuple[str, int], ...]
+
+
+class Advice(NamedTuple):
+    """ Indices that would cover recorded queries, configured indices that
+        are prefixes of other configured indices, and configured indices
+        that no recorded query can use. """
+    missing: List[Index]
+    redundant: List[Index]
+    unused: List[Index]
+
+
+def predicates(shape: QueryShape) -> List[Predicate]:
+    """ One predicate per `$or` branch, each with the equality and range
+        fields of the rest of the filter. Negations, `$nor`, `$text` and
+        `$where` are left out, since indices hardly help them. """
+    query_filter = json.loads(shape.query_filter)
+    return [Predicate(equality=tuple(equality),
+                      range=tuple(f for f in _range if f not in equality),
+                      sort=shape.sort)
+            for equality, _range in _branches(query_filter)]
+
+
+def is_covered(predicate: Predicate, index: Index) -> bool:
+    """ Whether `index` serves `predicate` without an in-memory sort and
+        without scanning keys outside of its equality fields, following
+        the equality, sort, range rule. """
+    fields = [(field.name, field.order) for field in index.fields]
+    equality = set(predicate.equality)
+    i = 0
+    while i < len(fields) and fields[i][0] in equality:
+        equality.discard(fields[i][0])
+        i += 1
+    if equality:
+        return False
+
+    sort = list(predicate.sort)
+    if sort:
+        index_sort = fields[i:i + len(sort)]
+        reversed_sort = [(name, -order) for name, order in sort]
+        if index_sort not in (sort, reversed_sort):
+            return False
+        i += len(sort)
+
+    return not predicate.range or (i < len(fields) and
+                                   fields[i][0] in predicate.range)
+
+
+def is_usable(predicate: Predicate, index: Index) -> bool:
+    """ Whether the query planner could use `index` at all for
+        `predicate`, which needs its first field to be filtered or
+        sorted on. """
+    first = index.fields[0].name
+    return (first in predicate.equality or first in predicate.range or
+            bool(predicate.sort) and predicate.sort[0][0] == first)
+
+
+def suggested_index(predicate: Predicate) -> Index:
+    fields = [Field(name=name, order=ORDERS['asc'])
+              for name in predicate.equality]
+    fields += [Field(name=name, order=order)
+               for name, order in predicate.sort
+               if name not in predicate.equality]
+    fields += [Field(name=name, order=ORDERS['asc'])
+               for name in predicate.range
+               if name not in {f.name for f in fields}]
+    return Index(fields=fields)
+
+
+def advise(shapes: List[ShapeStats],
+           collections: List[str] = None) -> Dict[str, Advice]:
+    """ Advice for every configured collection with recorded shapes, or
+        for `collections`. """
+    by_collection: Dict[str, List[Predicate]] = {}
+    for stats in shapes:
+        by_collection.setdefault(stats.shape.collection, []).extend(
+            predicates(stats.shape))
+
+    advice = {}
+    for name in collections or sorted(by_collection):
+        if name not in COLLECTIONS:
+            continue
+        configured = COLLECTIONS[name].indices
+        _predicates = by_collection.get(name, [])
+
+        missing = []
+        for predicate in _predicates:
+            if not predicate.equality and not predicate.range and \
+                    not predicate.sort:
+                continue
+            if any(is_covered(predicate, index)
+                   for index in configured + missing):
+                continue
+            missing.append(suggested_index(predicate))
+
+        advice[name] = Advice(
+            missing=_without_prefixes(missing),
+            redundant=[index for index in configured
+                       if _is_redundant(index, configured)],
+            unused=[index for index in configured
+                    if _predicates and _is_plain(index) and
+                    not any(is_usable(predicate, index)
+                            for predicate in _predicates)])
+    return advice
+
+
+def advice_yaml(advice: Dict[str, Advice]) -> str:
+    """ Missing indices as `indices` blocks of the collection
+        configuration, and the indices to drop as comments. """
+    collections = []
+    comments = []
+    for name, _advice in advice.items():
+        if _advice.missing:
+            collections.append({'name': name,
+                                'indices': [_index_yaml(index)
+                                            for index in _advice.missing]})
+        for reason, indices in (('redundant', _advice.redundant),
+                                ('unused', _advice.unused)):
+            for index in indices:
+                comments.append(f'# {name}: {reason} index '
+                                f'{_fields_text(index)}')
+
+    text = yaml.safe_dump({'collections': collections},
+                          sort_keys=False) if collections else ''
+    return text + ''.join(f'{comment}\n' for comment in comments)
+
+
+def _branches(query_filter: Dict) -> List[Tuple[List[str], List[str]]]:
+    equality, _range = [], []
+    or_branches = [([], [])]
+    for key, value in query_filter.items():
+        if key == '$and':
+            for clause in value:
+                branches = _branches(clause)
+                equality += branches[0][0]
+                _range += branches[0][1]
+        elif key == '$or':
+            or_branches = [branch for clause in value
+                           for branch in _branches(clause)]
+        elif key.startswith('$'):
+            continue
+        elif value == '$eq' or (isinstance(value, list) and
+                                set(value) <= EQUALITY_OPERATORS):
+            equality.append(key)
+        elif isinstance(value, list) and not {'$ne', '$nin',
+                                              '$not'} & set(value):
+            _range.append(key)
+
+    return [(_unique(equality + branch_equality),
+             _unique(_range + branch_range))
+            for branch_equality, branch_range in or_branches]
+
+
+def _unique(fields: List[str]) -> List[str]:
+    seen: Set[str] = set()
+    return [f for f in fields if not (f in seen or seen.add(f))]
+
+
+def _key(index: Index) -> List[Tuple[str, int]]:
+    return [(field.name, field.order) for field in index.fields]
+
+
+def _is_plain(index: Index) -> bool:
+    return not (index.unique or index.sparse or
+                index.partial_filter_expression or
+                index.expire_after_seconds is not None or index.collation)
+
+
+def _is_redundant(index: Index, indices: List[Index]) -> bool:
+    key = _key(index)
+    return _is_plain(index) and any(
+        other is not index and len(_key(other)) > len(key) and
+        _key(other)[:len(key)] == key and other.collation == index.collation
+        for other in indices)
+
+
+def _without_prefixes(indices: List[Index]) -> List[Index]:
+    return [index for index in indices
+            if not _is_redundant(index, indices)]
+
+
+def _index_yaml(index: Index) -> Dict:
+    fields = []
+    for field in index.fields:
+        _field = {'name': field.name}
+        if field.order != ORDERS['asc']:
+            _field['order'] = _ORDER_NAMES[field.order]
+        fields.append(_field)
+    return {'fields': fields}
+
+
+def _fields_text(index: Index) -> str:
+    return ', '.join(f'{field.name} {_ORDER_NAMES.get(field.order, "")}'
+                     .strip() for field in index.fields)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('shapes', help='file written by '
+                                       'QueryShapeRecorder.dump')
+    parser.add_argument('--collections', nargs='+')
+    args = parser.parse_args(argv)
+
+    shapes = QueryShapeRecorder.load(args.shapes).shapes()
+    print(advice_yaml(advise(shapes, collections=args.collections)), end='')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,2 +1,4 @@
+from mongo_odm.utils.cache import LRUCache
+from mongo_odm.utils.shm_ring import SharedRing, wait_readable
 from mongo_odm.utils.utils import (chunks, files_in_dir, iter_counter,
-                                   spawn_scope)
+                                   prefetched, sized_chunks, spawn_scope)
@@ -0,0 +1,189 @@
+""" Collections dumped as segments of concatenated BSON documents, the format
+    of mongodump, optionally compressed with gzip or zstd, next to a
+    manifest listing the segments. """
+import gzip
+import io
+import json
+import mmap
+import os
+import struct
+from typing import IO, Any, Dict, Generator, Iterable, List, Optional
+
+from bson.raw_bson import RawBSONDocument
+
+GZIP = 'gzip'
+ZSTD = 'zstd'
+COMPRESSIONS = (None, GZIP, ZSTD)
+
+MANIFEST = 'manifest.json'
+SEGMENT_BYTES = 256 * 1024 * 1024
+# Documents are written in batches of about this many bytes.
+WRITE_BYTES = 1024 * 1024
+# Fast levels, so that compressing keeps up with reading from the server.
+GZIP_LEVEL = 1
+ZSTD_LEVEL = 3
+
+_SUFFIXES = {None: '.bson', GZIP: '.bson.gz', ZSTD: '.bson.zst'}
+_LENGTH = struct.Struct('<i')
+
+
+def write_segments(docs: Iterable[RawBSONDocument],
+                   directory: str,
+                   compression: Optional[str] = GZIP,
+                   segment_bytes: int = SEGMENT_BYTES) -> Dict:
+    """ Writes `docs` to segments of `directory` holding at most
+        `segment_bytes` of uncompressed BSON each, or a single document if
+        it is bigger, and returns the manifest written next to them. """
+    if compression not in COMPRESSIONS:
+        raise ValueError(f'Compression must be one of {COMPRESSIONS}, not '
+                         f'{compression!r}')
+    os.makedirs(directory, exist_ok=True)
+
+    segments: List[Dict] = []
+    segment = None
+    pending: List[bytes] = []
+    pending_bytes = 0
+    try:
+        for doc in docs:
+            raw = doc.raw
+            if segment is None or (segment['bytes'] and segment['bytes'] +
+                                   len(raw) > segment_bytes):
+                if segment is not None:
+                    _flush(segment, pending)
+                    segment['file_object'].close()
+                segment = _new_segment(directory, len(segments), compression)
+                segments.append(segment)
+                pending, pending_bytes = [], 0
+            pending.append(raw)
+            pending_bytes += len(raw)
+            segment['count'] += 1
+            segment['bytes'] += len(raw)
+            if pending_bytes >= WRITE_BYTES:
+                _flush(segment, pending)
+                pending, pending_bytes = [], 0
+        if segment is not None:
+            _flush(segment, pending)
+    finally:
+        if segment is not None:
+            segment['file_object'].close()
+
+    manifest = {'compression': compression,
+                'count': sum(segment['count'] for segment in segments),
+                'bytes': sum(segment['bytes'] for segment in segments),
+                'segments': [{key: segment[key]
+                              for key in ('file', 'count', 'bytes')}
+                             for segment in segments]}
+    with open(os.path.join(directory, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_manifest(directory: str) -> Dict:
+    with open(os.path.join(directory, MANIFEST)) as f:
+        return json.load(f)
+
+
+def read_segments(directory: str) -> Generator[RawBSONDocument, None, None]:
+    """ Documents of the segments listed in the manifest of `directory`, in
+        order. Segments are memory mapped, and compressed ones are
+        decompressed from the map as they are read. """
+    manifest = read_manifest(directory)
+    for segment in manifest['segments']:
+        path = os.path.join(directory, segment['file'])
+        count = 0
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0,
+                                              access=mmap.ACCESS_READ) as mm:
+            if manifest['compression'] is None:
+                docs = _mapped_docs(mm, path)
+            else:
+                docs = _streamed_docs(_decompressed(mm,
+                                                    manifest['compression']),
+                                      path)
+            for doc in docs:
+                count += 1
+                yield doc
+        if count != segment['count']:
+            raise ValueError(f'{path} holds {count} documents, but the '
+                             f'manifest lists {segment["count"]}')
+
+
+def _new_segment(directory: str,
+                 number: int,
+                 compression: Optional[str]) -> Dict:
+    file = f'{number:05d}{_SUFFIXES[compression]}'
+    path = os.path.join(directory, file)
+    if compression == GZIP:
+        file_object = gzip.open(path, 'wb', compresslevel=GZIP_LEVEL)
+    elif compression == ZSTD:
+        file_object = _zstandard().ZstdCompressor(
+            level=ZSTD_LEVEL).stream_writer(open(path, 'wb'))
+    else:
+        file_object = open(path, 'wb')
+    return {'file': file, 'count': 0, 'bytes': 0, 'file_object': file_object}
+
+
+def _flush(segment: Dict, pending: List[bytes]) -> None:
+    if pending:
+        segment['file_object'].write(b''.join(pending))
+
+
+def _decompressed(mm: mmap.mmap, compression: str) -> IO[bytes]:
+    if compression == GZIP:
+        return gzip.GzipFile(fileobj=mm, mode='rb')
+    if compression == ZSTD:
+        return io.BufferedReader(
+            _zstandard().ZstdDecompressor().stream_reader(mm),
+            buffer_size=WRITE_BYTES)
+    raise ValueError(f'Compression must be one of {COMPRESSIONS}, not '
+                     f'{compression!r}')
+
+
+def _mapped_docs(mm: mmap.mmap,
+                 path: str) -> Generator[RawBSONDocument, None, None]:
+    offset = 0
+    while offset < len(mm):
+        if offset + _LENGTH.size > len(mm):
+            raise ValueError(f'{path} is truncated')
+        length = _LENGTH.unpack_from(mm, offset)[0]
+        if length < 5 or offset + length > len(mm):
+            raise ValueError(f'{path} is truncated')
+        yield RawBSONDocument(mm[offset:offset + length])
+        offset += length
+
+
+def _streamed_docs(stream: IO[bytes],
+                   path: str) -> Generator[RawBSONDocument, None, None]:
+    with stream:
+        while True:
+            prefix = _read(stream, _LENGTH.size)
+            if not prefix:
+                return
+            length = (_LENGTH.unpack(prefix)[0]
+                      if len(prefix) == _LENGTH.size else 0)
+            if length < 5:
+                raise ValueError(f'{path} is truncated')
+            rest = _read(stream, length - _LENGTH.size)
+            if len(rest) != length - _LENGTH.size:
+                raise ValueError(f'{path} is truncated')
+            yield RawBSONDocument(prefix + rest)
+
+
+def _read(stream: IO[bytes], n: int) -> bytes:
+    """ `n` bytes of `stream`, or fewer at its end; decompressing streams
+        may return less than asked for before that. """
+    data = stream.read(n)
+    while data and len(data) < n:
+        more = stream.read(n - len(data))
+        if not more:
+            break
+        data += more
+    return data
+
+
+def _zstandard() -> Any:
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError('zstd compression needs zstandard; install it, or '
+                          'mongodb-odm[zstd]') from None
+    return zstandard
@@ -0,0 +1,186 @@
+import multiprocessing
+import pickle
+import struct
+from multiprocessing.process import BaseProcess
+from multiprocessing.shared_memory import SharedMemory
+from multiprocessing.synchronize import Condition
+from typing import Dict, List, Optional
+
+RING_CAPACITY = 16 * 1024 * 1024
+# Seconds between checks that the other end of a ring is still alive while
+# waiting for it.
+LIVENESS_INTERVAL = 1.0
+
+_HEADER = struct.Struct('<II')
+_DATA = 0
+_ERROR = 1
+
+
+class SharedRing(object):
+    """ Byte ring buffer in shared memory, carrying frames from one producer
+        process to one consumer process.
+
+        Frames are written and read in pieces, so a frame may be larger than
+        the ring, and the producer blocks while the ring is full, which
+        bounds the memory in flight by bytes rather than by messages.
+        Rings of one consumer share a `condition`, so it can wait on all of
+        them at once with `wait_readable`.
+
+        A ring is created by the consumer and handed to the producer as a
+        Process argument. The consumer must `unlink` it when done. While
+        waiting, either end checks every LIVENESS_INTERVAL seconds that the
+        other one is alive and raises RuntimeError if it is not. """
+
+    def __init__(self,
+                 capacity: int = RING_CAPACITY,
+                 condition: Condition = None) -> None:
+        self._capacity = capacity
+        self._shm = SharedMemory(create=True, size=capacity)
+        self._condition = condition or multiprocessing.Condition()
+        self._head = multiprocessing.RawValue('Q', 0)
+        self._tail = multiprocessing.RawValue('Q', 0)
+        self._done = multiprocessing.RawValue('b', 0)
+
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        state['_shm'] = self._shm.name
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self._shm = _attached(state['_shm'])
+
+    def put(self, payload: bytes) -> None:
+        self._write(_HEADER.pack(len(payload), _DATA))
+        self._write(payload)
+
+    def put_error(self, error: BaseException) -> None:
+        """ Makes `get` raise `error` in the consumer. """
+        try:
+            payload = pickle.dumps(error)
+        except Exception:
+            payload = pickle.dumps(RuntimeError(repr(error)))
+        self._write(_HEADER.pack(len(payload), _ERROR))
+        self._write(payload)
+
+    def close(self) -> None:
+        """ Tells the consumer that no more frames will be put. """
+        with self._condition:
+            self._done.value = 1
+            self._condition.notify_all()
+
+    def get(self, producer: BaseProcess = None) -> Optional[bytes]:
+        """ Returns the next frame, waiting for it if necessary, or None once
+            the producer has closed the ring and every frame was read. If
+            the `producer` process is given, its exit without closing the
+            ring raises RuntimeError. """
+        header = self._read(_HEADER.size, producer)
+        if header is None:
+            return None
+        length, kind = _HEADER.unpack(header)
+        payload = self._read(length, producer) if length else b''
+        if payload is None:
+            raise EOFError('ring closed in the middle of a frame')
+        if kind == _ERROR:
+            raise pickle.loads(payload)
+        return payload
+
+    def unlink(self) -> None:
+        self._shm.close()
+        self._shm.unlink()
+
+    def _readable(self) -> bool:
+        return self._head.value > self._tail.value or bool(self._done.value)
+
+    def _write(self, data: bytes) -> None:
+        view = memoryview(data).cast('B')
+        written = 0
+        while written < len(view):
+            with self._condition:
+                while self._head.value - self._tail.value == self._capacity:
+                    if not self._condition.wait(LIVENESS_INTERVAL):
+                        _check_consumer()
+                start = self._head.value
+                free = self._capacity - (start - self._tail.value)
+
+            n = min(free, len(view) - written)
+            self._copy_in(start, view[written:written + n])
+            written += n
+
+            with self._condition:
+                self._head.value += n
+                self._condition.notify_all()
+
+    def _read(self,
+              length: int,
+              producer: BaseProcess = None) -> Optional[bytearray]:
+        data = bytearray(length)
+        read = 0
+        while read < length:
+            with self._condition:
+                while self._head.value == self._tail.value:
+                    if self._done.value:
+                        return None
+                    if not self._condition.wait(LIVENESS_INTERVAL):
+                        _check_producer(producer)
+                start = self._tail.value
+                available = self._head.value - start
+
+            n = min(available, length - read)
+            self._copy_out(start, memoryview(data)[read:read + n])
+            read += n
+
+            with self._condition:
+                self._tail.value += n
+                self._condition.notify_all()
+
+        return data
+
+    def _copy_in(self, start: int, chunk: memoryview) -> None:
+        offset = start % self._capacity
+        first = min(len(chunk), self._capacity - offset)
+        self._shm.buf[offset:offset + first] = chunk[:first]
+        self._shm.buf[:len(chunk) - first] = chunk[first:]
+
+    def _copy_out(self, start: int, chunk: memoryview) -> None:
+        offset = start % self._capacity
+        first = min(len(chunk), self._capacity - offset)
+        chunk[:first] = self._shm.buf[offset:offset + first]
+        chunk[first:] = self._shm.buf[:len(chunk) - first]
+
+
+def wait_readable(rings: List[SharedRing],
+                  condition: Condition,
+                  timeout: float = None) -> Optional[SharedRing]:
+    """ Returns one of `rings` that has data or was closed, or None if there
+        is none after `timeout` seconds. All rings must share `condition`. """
+    with condition:
+        while True:
+            for ring in rings:
+                if ring._readable():
+                    return ring
+            if not condition.wait(timeout):
+                return None
+
+
+def _check_producer(producer: Optional[BaseProcess]) -> None:
+    if producer is not None and producer.exitcode is not None:
+        raise RuntimeError(f'{producer.name} exited with code '
+                           f'{producer.exitcode} without closing its ring')
+
+
+def _check_consumer() -> None:
+    consumer = multiprocessing.parent_process()
+    if consumer is not None and not consumer.is_alive():
+        raise RuntimeError('Consumer of the ring exited')
+
+
+def _attached(name: str) -> SharedMemory:
+    """ Attaches to an existing segment. Producers share the resource
+        tracker of the consumer that created it, so before Python 3.13,
+        where tracking cannot be turned off, registering it again is a
+        no-op. """
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        return SharedMemory(name=name)
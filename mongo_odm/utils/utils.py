@@ -3,9 +3,11 @@ import logging
 import multiprocessing
 import os
 import sys
+import threading
 from contextlib import contextmanager
 from glob import glob
-from typing import Generator, Iterable, List
+from queue import Full, Queue
+from typing import Any, Callable, Generator, Iterable, List
 
 from str2bool import str2bool
 
@@ -70,3 +72,85 @@ def chunks(iterator: Iterable, n: int) -> Generator[Iterable, None, None]:
         for first in iterator:
             rest_of_chunk = itertools.islice(iterator, 0, n - 1)
             yield itertools.chain([first], rest_of_chunk)
+
+
+def sized_chunks(iterable: Iterable,
+                 n: int,
+                 max_bytes: int = None,
+                 sizeof: Callable[[Any], int] = None
+                 ) -> Generator[List, None, None]:
+    """ Splits iterable into lists of at most `n` elements. If `max_bytes` is
+        set, a list is also closed before its elements, as measured by
+        `sizeof`, would exceed `max_bytes`. An element bigger than
+        `max_bytes` forms a list of its own. """
+    chunk = []
+    chunk_bytes = 0
+    for element in iterable:
+        element_bytes = sizeof(element) if max_bytes else 0
+        if chunk and (len(chunk) >= n or
+                      (max_bytes and chunk_bytes + element_bytes > max_bytes)):
+            yield chunk
+            chunk = []
+            chunk_bytes = 0
+        chunk.append(element)
+        chunk_bytes += element_bytes
+
+    if chunk:
+        yield chunk
+
+
+_DONE = object()
+
+
+class _ProducerError(object):
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+def prefetched(iterable: Iterable,
+               num_of_batches: int,
+               batch_size: int) -> Generator:
+    """ Consumes iterable on a background thread that keeps up to
+        `num_of_batches` batches of `batch_size` elements ready, so that
+        producing the next elements (e.g. cursor round trips) overlaps with
+        processing the current ones. Exceptions of the producer are raised
+        in the consumer. Closing the generator stops the producer and
+        closes iterable, if it can be closed. """
+    queue = Queue(maxsize=num_of_batches)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for batch in sized_chunks(iterable, n=batch_size):
+                if not put(batch):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(_ProducerError(e))
+        finally:
+            close = getattr(iterable, 'close', None)
+            if close:
+                close()
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            batch = queue.get()
+            if batch is _DONE:
+                return
+            if isinstance(batch, _ProducerError):
+                raise batch.error
+            yield from batch
+    finally:
+        stop.set()
+        producer.join()
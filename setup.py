@@ -22,7 +22,7 @@ SHORT_DESCRIPTION = """
 Object Document Mapper for MongoDB.""".strip()
 
 DEPENDENCIES = [
-    'pymongo',
+    'pymongo>=4.13',
     'str2bool',
     'pyyaml',
     'dict-objectify'
@@ -32,6 +32,11 @@ TEST_DEPENDENCIES = [
     'pytest'
 ]
 
+EXTRA_DEPENDENCIES = {
+    'columns': ['numpy', 'pyarrow'],
+    'zstd': ['zstandard']
+}
+
 VERSION = '0.0.1'
 URL = 'https://github.com/reljicd/python-mongodb-object-document-mapper'
 
@@ -46,7 +51,7 @@ setup(
     author_email='reljicd@google.com',
     license='Apache Software License',
 
-    packages=find_packages('.', exclude=['docker', 'scripts',
+    packages=find_packages('.', exclude=['benchmarks', 'docker', 'scripts',
                                          'tests', 'tests.*']),
 
     classifiers=[
@@ -74,5 +79,6 @@ setup(
     keywords='mapper mapping dict dictionary object oop json mongo mongodb',
 
     install_requires=DEPENDENCIES,
+    extras_require=EXTRA_DEPENDENCIES,
     tests_require=TEST_DEPENDENCIES
 )
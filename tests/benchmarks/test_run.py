@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from benchmarks import run
+from benchmarks.generator import researcher_dicts
+from benchmarks.run import main, regressions
+from fixtures.models.researcher import Researcher
+
+BASELINE = {'results': {'find/10000': {'docs_per_sec': 1000},
+                        'query/10000': {'docs_per_sec': 1000}}}
+
+
+def test_researcher_dicts():
+    docs = list(researcher_dicts(10, seed=1))
+    assert docs == list(researcher_dicts(10, seed=1))
+    assert len({doc['_id'] for doc in docs}) == 10
+    assert Researcher(docs[0]).first_name == docs[0]['first_name']
+
+
+def test_regressions():
+    results = {'results': {'find/10000': {'docs_per_sec': 800},
+                           'query/10000': {'docs_per_sec': 700},
+                           'hash/10000': {'docs_per_sec': 10}}}
+    slower = regressions(results, BASELINE, tolerance=0.25)
+    assert len(slower) == 1
+    assert slower[0].startswith('query/10000')
+
+
+def test_missing_baseline(tmp_path):
+    with pytest.raises(SystemExit):
+        main(['--baseline', str(tmp_path / 'baseline.json')])
+
+
+@pytest.mark.parametrize('docs_per_sec, status', [(1, 0), (1e15, 1)])
+def test_main(tmp_path, monkeypatch, capsys, docs_per_sec, status):
+    monkeypatch.setattr(run, 'mongo_available', lambda: False)
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(json.dumps(
+        {'results': {'hash/10': {'docs_per_sec': docs_per_sec},
+                     'iterate/10': {'docs_per_sec': docs_per_sec}}}))
+    output = tmp_path / 'results.json'
+
+    assert main(['--sizes', '10', '--cases', 'hash', 'iterate', 'find',
+                 '--repeat', '1', '--output', str(output),
+                 '--baseline', str(baseline)]) == status
+
+    results = json.loads(output.read_text())['results']
+    assert sorted(results) == ['hash/10', 'iterate/10']
+    out = capsys.readouterr().out
+    assert 'find: skipped' in out
+    assert ('REGRESSION hash/10' in out) == bool(status)
+
+
+def test_save_baseline(tmp_path, monkeypatch):
+    monkeypatch.setattr(run, 'mongo_available', lambda: False)
+    baseline = tmp_path / 'baseline.json'
+
+    assert main(['--sizes', '10', '--cases', 'iterate', '--repeat', '1',
+                 '--baseline', str(baseline), '--save-baseline']) == 0
+    assert 'iterate/10' in json.loads(baseline.read_text())['results']
@@ -0,0 +1,69 @@
+import os
+
+from mongo_odm.config import config
+from mongo_odm.config.config import COLLECTIONS, LazyMapping
+
+
+def test_lazy_mapping():
+    loads = []
+
+    def load():
+        loads.append(1)
+        return {'a': 1}
+
+    mapping = LazyMapping(load)
+    assert not loads
+    assert mapping['a'] == 1
+    assert dict(mapping) == {'a': 1}
+    assert len(loads) == 1
+
+    mapping.reset()
+    assert 'a' in mapping
+    assert len(loads) == 2
+
+
+def test_collection_model():
+    researchers = COLLECTIONS['researchers']
+    assert researchers.model_path.endswith('researcher.Researcher')
+    assert researchers.model.__name__ == 'Researcher'
+
+
+def test_dbs_cache(tmp_path, monkeypatch):
+    cache_path = str(tmp_path / 'db_configs.pickle')
+    monkeypatch.setattr(config, 'DB_CONFIGS_CACHE', cache_path)
+
+    dbs = config.load_dbs()
+    assert os.path.exists(cache_path)
+
+    monkeypatch.setattr(config.yaml, 'load', None)
+    assert config.load_dbs() == dbs
+
+
+def test_indices():
+    _indices = config.indices({'indices': [
+        {'fields': [{'name': 'last_name'},
+                    {'name': 'h_index', 'order': 'desc'}],
+         'order': 'asc',
+         'partial_filter_expression': {'h_index': {'$gt': 5}},
+         'collation': {'locale': 'en', 'strength': 2}},
+        {'fields': [{'name': 'created_at'}],
+         'expire_after_seconds': 3600,
+         'sparse': True},
+        {'fields': [{'name': '_id', 'order': 'hashed'}]}]})
+
+    assert _indices[0].fields == [('last_name', 1), ('h_index', -1)]
+    assert _indices[0].partial_filter_expression == {'h_index': {'$gt': 5}}
+    assert _indices[0].collation == {'locale': 'en', 'strength': 2}
+    assert _indices[1].expire_after_seconds == 3600
+    assert _indices[1].sparse
+    assert _indices[2].fields == [('_id', 'hashed')]
+
+
+def test_client_options(monkeypatch):
+    monkeypatch.setitem(config.DBS._mapping(), 'pooled_db',
+                        {'client': {'max_pool_size': 50,
+                                    'compressors': 'zstd,zlib'}})
+    options = config.client_options('pooled_db')
+    assert options.max_pool_size == 50
+    assert options.compressors == ('zstd', 'zlib')
+    assert config.client_options('unknown_db') == config.ClientOptions()
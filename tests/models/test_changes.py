@@ -0,0 +1,46 @@
+import pytest
+
+from fixtures.models.commons import Country
+from fixtures.models.researcher import Researcher
+from mongo_odm.models.base import update_document
+
+RESEARCHER_DICT = {'_id': '1',
+                   'first_name': 'Test',
+                   'last_name': 'Researcher',
+                   'country': {'name': 'belgium',
+                               'code': 'be'},
+                   'keywords': ['keyword_1', 'keyword_2']}
+
+
+def test_update_document():
+    old = {'a': 1, 'b': {'c': 2, 'd': 3}, 'e': [1, 2], 'f': [1, 2], 'g': 4}
+    new = {'a': 1, 'b': {'c': 5, 'd': 3}, 'e': [1, 2, 3], 'f': [2], 'h': 6}
+
+    assert update_document(old, new) == {'$set': {'b.c': 5,
+                                                  'f': [2],
+                                                  'h': 6},
+                                         '$push': {'e': {'$each': [3]}},
+                                         '$unset': {'g': ''}}
+    assert update_document(old, old) == {}
+
+
+def test_changes():
+    researcher = Researcher(data_dict=dict(RESEARCHER_DICT))
+    researcher.mark_clean()
+    assert researcher.changes() == {}
+
+    researcher.keywords = researcher.keywords + ['keyword_3']
+    researcher.country = Country(name='belgium', code='BE')
+    researcher.check_hash_and_update()
+
+    changes = researcher.changes()
+    assert changes['$push'] == {'keywords': {'$each': ['keyword_3']}}
+    assert changes['$set']['country.code'] == 'BE'
+    assert {'country.code', '_hash'} <= set(changes['$set'])
+
+
+def test_untracked_changes():
+    researcher = Researcher(data_dict=dict(RESEARCHER_DICT))
+    assert not researcher.is_tracked()
+    with pytest.raises(ValueError):
+        researcher.changes()
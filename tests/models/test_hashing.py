@@ -200,3 +200,28 @@ def test_duplicates():
     base_obj1 = MongoBase(data_dict=obj1)
     base_obj2 = MongoBase(data_dict=obj2)
     assert base_obj1._hash != base_obj2._hash
+
+
+def test_trusted_load_keeps_stored_hash():
+    dct = dict(RESEARCHER_DICT_VER_3,
+               _hash='stored',
+               updated_at='2019-03-17T15:11:21Z')
+    researcher = Researcher(data_dict=dct, trusted=True)
+
+    assert researcher._hash == 'stored'
+    assert researcher.data_dict['updated_at'] == '2019-03-17T15:11:21Z'
+
+    researcher.ensure_hash()
+    assert researcher._hash == Researcher(
+        data_dict=dict(RESEARCHER_DICT_VER_3))._hash
+
+
+def test_ensure_hash_after_assignment(researcher_1: Researcher):
+    hash_before_update = researcher_1._hash
+
+    researcher_1.ensure_hash()
+    assert researcher_1._hash == hash_before_update
+
+    researcher_1.first_name = 'Updated_name'
+    researcher_1.ensure_hash()
+    assert researcher_1._hash != hash_before_update
@@ -0,0 +1,52 @@
+import copy
+
+from bson import encode
+from bson.raw_bson import RawBSONDocument
+
+from fixtures.models.researcher import Researcher
+from mongo_odm.models.lazy import LazyDocument
+
+RESEARCHER_DICT = {'_id': '1',
+                   '_hash': 'stored',
+                   'first_name': 'Test',
+                   'country': {'name': 'belgium',
+                               'code': 'be'},
+                   'identifiers': [{'name': 'fris', 'value': '1'}],
+                   'updated_at': '2019-03-17T15:11:21Z'}
+
+
+def lazy_document() -> LazyDocument:
+    return LazyDocument(RawBSONDocument(encode(RESEARCHER_DICT)))
+
+
+def test_fields_decoded_on_access():
+    document = lazy_document()
+    researcher = Researcher(data_dict=document, trusted=True)
+
+    assert researcher.first_name == 'Test'
+    assert researcher.country.code == 'be'
+    assert researcher.identifiers[0].value == '1'
+    assert researcher._hash == 'stored'
+    assert set(dict.keys(document)) == {'first_name', 'country',
+                                        'identifiers', '_hash'}
+
+
+def test_behaves_like_dict():
+    document = lazy_document()
+
+    assert len(document) == len(RESEARCHER_DICT)
+    assert 'country' in document
+    assert document.get('missing') is None
+    assert document == RESEARCHER_DICT
+    assert copy.deepcopy(document) == RESEARCHER_DICT
+    assert type(document.copy()) is dict
+
+
+def test_setting_and_deleting_fields():
+    document = lazy_document()
+    document['first_name'] = 'Updated'
+    del document['country']
+
+    assert document['first_name'] == 'Updated'
+    assert 'country' not in document
+    assert len(document) == len(RESEARCHER_DICT) - 1
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from fixtures.models.commons import Identifier
+from fixtures.models.researcher import Researcher
+from mongo_odm.repos.async_repo import AsyncMongoRepo
+from mongo_odm.repos.async_repos import AsyncMongoRepos
+
+COLLECTION = 'researchers'
+COUNT = 11
+
+
+async def _reset_mongo() -> AsyncMongoRepo:
+    researchers_repo = await AsyncMongoRepos.repo(COLLECTION)
+    await researchers_repo.delete_all()
+    await researchers_repo.bulk_insert(
+        Researcher(_id=str(i),
+                   first_name=f'Name_{i}',
+                   identifiers=[Identifier(name='test', value=str(i))]
+                   ).data_dict
+        for i in range(1, COUNT + 1))
+    return researchers_repo
+
+
+@pytest.fixture()
+def researchers_repo() -> AsyncMongoRepo:
+    return asyncio.run(_reset_mongo())
+
+
+def test_async_count(researchers_repo: AsyncMongoRepo):
+    assert asyncio.run(researchers_repo.count()) == COUNT
+
+
+def test_async_query(researchers_repo: AsyncMongoRepo):
+    async def _query():
+        return [researcher async for researcher
+                in researchers_repo.query({'_id': {'$in': ['1', '2']}})]
+
+    researchers = asyncio.run(_query())
+    assert {researcher.first_name for researcher in researchers} == {
+        'Name_1', 'Name_2'}
+
+
+def test_async_query_by_id(researchers_repo: AsyncMongoRepo):
+    researcher = asyncio.run(researchers_repo.query_by_id('3'))
+    assert researcher.first_name == 'Name_3'
+    assert asyncio.run(researchers_repo.query_by_id('-1')) is None
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+from bson import decode, encode
+from bson.raw_bson import RawBSONDocument
+from pymongo.errors import BulkWriteError
+from pymongo.operations import InsertOne, UpdateOne
+
+from mongo_odm.models.lazy import LazyDocument
+from mongo_odm.repos.buffered_writer import (_merged, _NOT_MERGEABLE, _raw,
+                                             BufferedWriter, DELETE, INSERT,
+                                             UPDATE, UPSERT)
+
+
+class RecordingRepo(object):
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.batches = []
+
+    def bulk_write(self, requests, ordered=False):
+        if self.fail:
+            raise BulkWriteError({'writeErrors': []})
+        self.batches.append(requests)
+
+
+def test_merged():
+    insert = (INSERT, _raw({'_id': 1, 'a': {'b': 1}}))
+    operation, doc = _merged(insert, (UPDATE, {'a.c': 2}))
+    assert operation == INSERT
+    assert decode(doc.raw) == {'_id': 1, 'a': {'b': 1, 'c': 2}}
+
+    assert _merged(insert, (DELETE, None)) == (DELETE, None)
+    assert _merged(insert, insert) is _NOT_MERGEABLE
+    assert _merged((DELETE, None), insert)[0] == UPSERT
+    assert _merged((UPDATE, {'a': 1}), (UPDATE, {'b': 2})) == (
+        UPDATE, {'a': 1, 'b': 2})
+    assert _merged((UPDATE, {'a': 1}), (UPDATE, {'a.b': 2})) is (
+        _NOT_MERGEABLE)
+    assert _merged((UPDATE, {'a': 1}), insert) is _NOT_MERGEABLE
+
+
+def test_update_not_merged_into_doc():
+    insert = (INSERT, _raw({'_id': 1, 'tags': ['a', 'b'], 'n': 5}))
+    assert _merged(insert, (UPDATE, {'tags.1': 'z'})) is _NOT_MERGEABLE
+    assert _merged(insert, (UPDATE, {'n.x': 1})) is _NOT_MERGEABLE
+
+    operation, doc = _merged(insert, (UPDATE, {'m.x': 1}))
+    assert decode(doc.raw)['m'] == {'x': 1}
+
+
+def test_lazy_document():
+    doc = {'_id': 1, 'a': 1, 'b': 2}
+    lazy = LazyDocument(RawBSONDocument(encode(doc)))
+    assert lazy['_id'] == 1
+    assert decode(_raw(lazy).raw) == doc
+
+
+def test_flush_on_count():
+    repo = RecordingRepo()
+    with BufferedWriter(repo, max_ops=3, max_delay=60) as writer:
+        for i in range(7):
+            writer.insert_one({'_id': i})
+        writer.update_one(6, {'a': 1})
+    assert sum(len(batch) for batch in repo.batches) == 7
+    assert all(len(batch) <= 3 for batch in repo.batches)
+    assert isinstance(repo.batches[-1][-1], InsertOne)
+
+
+def test_flush_on_delay():
+    repo = RecordingRepo()
+    writer = BufferedWriter(repo, max_delay=0.05)
+    writer.update_one(1, {'a': 1})
+    time.sleep(0.5)
+    assert len(repo.batches) == 1
+    assert isinstance(repo.batches[0][0], UpdateOne)
+    writer.close()
+
+
+def test_error_is_raised():
+    writer = BufferedWriter(RecordingRepo(fail=True))
+    writer.delete_by_id(1)
+    with pytest.raises(BulkWriteError):
+        writer.flush()
+    writer.close()
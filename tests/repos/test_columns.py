@@ -0,0 +1,50 @@
+from datetime import datetime
+
+import pytest
+from bson import encode
+from bson.raw_bson import RawBSONDocument
+
+from mongo_odm.repos.columns import columns, field_value, projection
+
+DOCS = [RawBSONDocument(encode(doc)) for doc in (
+    {'age': 30, 'name': 'A', 'address': {'city': 'Paris'},
+     'born': datetime(1990, 1, 1), 'score': 1.5},
+    {'age': 40, 'name': 'B', 'address': {},
+     'born': datetime(1980, 1, 1)})]
+
+
+def test_field_value():
+    assert field_value(DOCS[0], 'address.city') == 'Paris'
+    assert field_value(DOCS[1], 'address.city') is None
+    assert field_value(DOCS[0], 'name.first') is None
+
+
+def test_projection():
+    assert projection(['age', 'address.city']) == {'age': True,
+                                                   'address.city': True,
+                                                   '_id': False}
+    assert projection(['_id']) == {'_id': True}
+
+
+def test_numpy_columns():
+    np = pytest.importorskip('numpy')
+    result = columns(DOCS, ['age', 'address.city', 'born'],
+                     dtypes={'age': 'int64', 'born': 'datetime64[ms]'})
+    assert result['age'].dtype == np.int64
+    assert result['age'].tolist() == [30, 40]
+    assert result['address.city'].tolist() == ['Paris', None]
+    assert result['born'][0] == np.datetime64('1990-01-01')
+
+    scores = columns(DOCS, ['score'], dtypes={'score': 'float64'})['score']
+    assert scores[0] == 1.5 and np.isnan(scores[1])
+    with pytest.raises(ValueError):
+        columns(DOCS, ['score'], dtypes={'score': 'int64'})
+
+
+def test_arrow_columns():
+    pa = pytest.importorskip('pyarrow')
+    batch = columns(DOCS, ['age', 'address.city'],
+                    dtypes={'age': 'int32'}, arrow=True)
+    assert batch.num_rows == 2
+    assert batch.schema.field('age').type == pa.int32()
+    assert batch.column(1).to_pylist() == ['Paris', None]
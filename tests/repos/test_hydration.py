@@ -0,0 +1,38 @@
+from functools import partial
+
+from fixtures.models.researcher import Researcher
+from mongo_odm.repos.hydration import HydrationPool
+
+RESEARCHER_DICTS = [{'_id': str(i),
+                     'first_name': f'Test {i}',
+                     'keywords': ['keyword_1', 'keyword_2']}
+                    for i in range(50)]
+
+
+def test_hydrate_ordered():
+    pool = HydrationPool(processes=2)
+    try:
+        docs = list(pool.hydrate(Researcher,
+                                 iter(RESEARCHER_DICTS),
+                                 ordered=True,
+                                 batch_size=7))
+    finally:
+        pool.close()
+
+    assert [doc['_id'] for doc in docs] == [str(i) for i in range(50)]
+    for doc in docs:
+        assert doc['_hash'] == str(Researcher(dict(doc)).__hash__())
+
+
+def test_hydrate_trusted():
+    researcher_dicts = [Researcher(dict(researcher_dict)).data_dict
+                        for researcher_dict in RESEARCHER_DICTS]
+    pool = HydrationPool(processes=2)
+    try:
+        docs = list(pool.hydrate(partial(Researcher, trusted=True),
+                                 researcher_dicts,
+                                 batch_size=7))
+    finally:
+        pool.close()
+
+    assert sorted(docs, key=lambda doc: int(doc['_id'])) == researcher_dicts
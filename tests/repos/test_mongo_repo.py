@@ -1,8 +1,13 @@
+import asyncio
+
 import pytest
 
 from fixtures.models.commons import Identifier
+from fixtures.models.commons import Organisation as CommonsOrganisation
+from fixtures.models.organisation import Organisation
 from fixtures.models.researcher import Researcher
-from mongo_odm.repos.repo import MongoRepo
+from mongo_odm.repos.async_repo import AsyncMongoRepo
+from mongo_odm.repos.repo import MongoDocRepo, MongoRepo
 from mongo_odm.repos.repos import MongoRepos
 
 COLLECTION = 'researchers'
@@ -42,3 +47,206 @@ def test_exists_one(researchers_repo: MongoRepo, reset_mongo):
 def test_all_parallel(researchers_repo: MongoRepo, reset_mongo):
     researchers = list(researchers_repo.all_parallel())
     assert len(researchers) == COUNT
+
+
+def test_find_parallel(researchers_repo: MongoRepo, reset_mongo):
+    query_filter = {'first_name': {'$ne': 'Name_1'}}
+    researchers = list(researchers_repo.find_parallel(query_filter,
+                                                      num_of_processes=4))
+    ids = {researcher['_id'] for researcher in researchers}
+    assert len(researchers) == COUNT - 1
+    assert len(ids) == COUNT - 1
+
+
+def test_id_ranges(researchers_repo: MongoRepo, reset_mongo):
+    id_ranges = researchers_repo.id_ranges(num_of_ranges=4)
+    assert len(id_ranges) == 4
+    assert id_ranges[0].lower is None
+    assert id_ranges[-1].upper is None
+    assert sum(researchers_repo.count(id_range.query_filter())
+               for id_range in id_ranges) == COUNT
+
+
+def test_bulk_insert_chunks(researchers_repo: MongoRepo, reset_mongo):
+    researchers_repo.delete_all()
+    docs = (Researcher(_id=str(i), first_name=f'Name_{i}').data_dict
+            for i in range(COUNT))
+    result = researchers_repo.bulk_insert(docs,
+                                          chunk_size=10,
+                                          max_chunk_bytes=1024,
+                                          max_workers=3)
+    assert result.inserted_count == COUNT
+    assert researchers_repo.count() == COUNT
+
+    docs = ({'_id': str(i), 'first_name': 'Updated'}
+            for i in range(COUNT + 5))
+    result = researchers_repo.bulk_update(docs, chunk_size=7)
+    assert result.modified_count == COUNT
+    assert sorted(result.upserted_ids) == list(range(COUNT, COUNT + 5))
+    assert researchers_repo.count({'first_name': 'Updated'}) == COUNT + 5
+
+
+def test_update_obj(researchers_repo: MongoRepo, reset_mongo):
+    researcher = researchers_repo.query_by_id('1', track_changes=True)
+    hash_before_update = researcher._hash
+
+    researcher.keywords = ['keyword_1']
+    assert researcher.changed_paths() == ['keywords']
+
+    researchers_repo.save_obj(researcher)
+    assert researcher.changes() == {}
+
+    stored = researchers_repo.query_by_id('1')
+    assert stored.keywords == ['keyword_1']
+    assert stored.first_name == 'Name_1'
+    assert stored._hash == researcher._hash != hash_before_update
+
+
+def test_lazy_query(researchers_repo: MongoRepo, reset_mongo):
+    researchers = list(researchers_repo.query({'_id': {'$in': ['1', '2']}},
+                                              projection=['first_name'],
+                                              lazy=True))
+    assert {researcher.first_name for researcher in researchers} == {
+        'Name_1', 'Name_2'}
+
+    researcher = researchers_repo.query_by_id('3', lazy=True)
+    assert researcher.identifiers[0].value == '3'
+
+
+def test_query_processes(researchers_repo: MongoRepo, reset_mongo):
+    researchers = list(researchers_repo.query(num_of_processes=2))
+    assert len({researcher._id for researcher in researchers}) == COUNT
+
+    with pytest.raises(ValueError):
+        next(researchers_repo.query(lazy=True, num_of_processes=2))
+
+
+def test_cached_query_by_id(reset_mongo):
+    organisations_repo = MongoRepos.repo('organisations')
+    organisations_repo.insert_obj(Organisation(_id='1', name='Name'))
+
+    assert organisations_repo.query_by_id('1').name == 'Name'
+    hits = organisations_repo.cache.stats()['hits']
+    organisation = organisations_repo.query_by_id('1')
+    assert organisations_repo.cache.stats()['hits'] == hits + 1
+
+    organisation.name = 'Updated'
+    organisations_repo.replace_obj(organisation)
+    assert organisations_repo.query_by_id('1').name == 'Updated'
+
+    organisations_repo.delete_obj(organisation)
+    assert organisations_repo.query_by_id('1') is None
+
+
+def test_cache_shared_between_repos(reset_mongo):
+    organisations_repo = MongoRepos.repo('organisations')
+    organisations_repo.insert_obj(Organisation(_id='1', name='Name'))
+    assert organisations_repo.query_by_id('1').name == 'Name'
+
+    MongoDocRepo('organisations').update_one('1', {'name': 'Updated'})
+    assert organisations_repo.query_by_id('1').name == 'Updated'
+
+    asyncio.run(AsyncMongoRepo('organisations').update_one(
+        '1', {'name': 'Updated again'}))
+    assert organisations_repo.query_by_id('1').name == 'Updated again'
+
+
+def test_iter_pages(researchers_repo: MongoRepo, reset_mongo):
+    pages = list(researchers_repo.iter_pages(page_size=25,
+                                             sort=[('first_name', -1)],
+                                             projection=['_hash']))
+    ids = [doc['_id'] for page in pages for doc in page.docs]
+    assert [len(page.docs) for page in pages] == [25, 25, 25, 25, 11]
+    assert len(set(ids)) == COUNT
+    assert pages[0].docs[0]['first_name'] == 'Name_99'
+
+    resumed = researchers_repo.paginate(page_size=25,
+                                        sort=[('first_name', -1)],
+                                        projection=['_hash'],
+                                        token=pages[1].next_token)
+    assert resumed.docs == pages[2].docs
+
+
+def test_export_import_collection(researchers_repo: MongoRepo, reset_mongo,
+                                  tmp_path):
+    manifest = researchers_repo.export_collection(str(tmp_path),
+                                                  segment_bytes=1000)
+    assert manifest['count'] == COUNT
+    assert len(manifest['segments']) > 1
+
+    assert researchers_repo.import_collection(str(tmp_path),
+                                              drop=True) == COUNT
+    assert researchers_repo.count() == COUNT
+    assert researchers_repo.query_by_id('1').first_name == 'Name_1'
+
+
+def test_sync_objs(researchers_repo: MongoRepo, reset_mongo):
+    researchers = [Researcher(_id=str(i),
+                              first_name=f'Name_{i}',
+                              identifiers=[Identifier(name='test',
+                                                      value=str(i))])
+                   for i in range(COUNT - 9, COUNT + 6)]
+    researchers[0].first_name = 'Changed'
+
+    result = researchers_repo.sync_objs(iter(researchers), batch_size=4)
+    assert result.inserted == 5
+    assert result.updated == 1
+    assert result.unchanged == 9
+    assert researchers_repo.count() == COUNT + 5
+    assert researchers_repo.query_by_id(
+        str(COUNT - 9)).first_name == 'Changed'
+
+
+def test_sync_objs_nested_change(researchers_repo: MongoRepo, reset_mongo):
+    researcher = researchers_repo.query_by_id('1')
+    researcher.identifiers[0].value = 'changed'
+    duplicate = Researcher(_id='2', first_name='First')
+    last = Researcher(_id='2', first_name='Last')
+
+    result = researchers_repo.sync_objs([researcher, duplicate, last])
+    assert result.updated == 2
+    assert researchers_repo.query_by_id(
+        '1').identifiers[0].value == 'changed'
+    assert researchers_repo.query_by_id('2').first_name == 'Last'
+
+
+def test_query_by_ids(researchers_repo: MongoRepo, reset_mongo):
+    ids = ['5', '-1', '3', '5', '100']
+    lookup = researchers_repo.query_by_ids(ids, chunk_size=2, max_workers=2)
+    assert [researcher._id for researcher in lookup.found] == ['5', '3',
+                                                               '100']
+    assert lookup.missing == ['-1']
+
+    lookup = researchers_repo.find_by_ids(ids, projection=['first_name'],
+                                          as_dict=True)
+    assert lookup.found['3'] == {'_id': '3', 'first_name': 'Name_3'}
+
+
+def test_populate(researchers_repo: MongoRepo, reset_mongo):
+    MongoRepos.repo('organisations').insert_obj(
+        Organisation(_id='o1',
+                     name='Organisation',
+                     identifiers=[Identifier(name='ringgold', value='10')]))
+    researcher = researchers_repo.query_by_id('1')
+    researcher.organisations = [
+        CommonsOrganisation(
+            identifiers=[Identifier(name='ringgold', value='10')]),
+        CommonsOrganisation(
+            identifiers=[Identifier(name='ringgold', value='11')])]
+
+    populated = list(researchers_repo.populate(
+        [researcher, researchers_repo.query_by_id('2')], 'organisations'))
+    assert [organisation and organisation._id
+            for organisation in populated[0].populated_organisations] == [
+        'o1', None]
+    assert populated[1].populated_organisations == []
+
+
+def test_replace_one_lazy_document(researchers_repo: MongoRepo, reset_mongo):
+    researcher = researchers_repo.query_by_id('1', lazy=True)
+    assert researcher.first_name == 'Name_1'
+
+    researchers_repo.replace_one(researcher.data_dict)
+    stored = researchers_repo.find_one({'_id': '1'})
+    assert stored['identifiers'] == [{'name': 'test', 'value': '1'}]
+    assert '_hash' in stored
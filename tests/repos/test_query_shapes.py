@@ -0,0 +1,35 @@
+from mongo_odm.repos.query_shapes import (normalized_filter, query_shape,
+                                          QueryShapeRecorder)
+
+
+def test_normalized_filter():
+    assert normalized_filter({'first_name': 'Name',
+                              'h_index': {'$gt': 3, '$lte': 10},
+                              '$or': [{'last_name': {'$in': ['a', 'b']}},
+                                      {'country': {'code': 'be'}}]}) == {
+        'first_name': '$eq',
+        'h_index': ['$gt', '$lte'],
+        '$or': [{'last_name': ['$in']}, {'country': '$eq'}]}
+
+
+def test_same_shape():
+    assert (query_shape('researchers', 'find', {'first_name': 'A'},
+                        [('h_index', -1)]) ==
+            query_shape('researchers', 'find', {'first_name': 'B'},
+                        [('h_index', -1)]))
+
+
+def test_recorder(tmp_path):
+    recorder = QueryShapeRecorder()
+    assert list(recorder.timed('researchers', 'find', {'first_name': 'A'},
+                               None, iter(range(3)))) == [0, 1, 2]
+    recorder.record('researchers', 'find', {'first_name': 'B'}, None, 0.5)
+
+    shapes = recorder.shapes()
+    assert len(shapes) == 1
+    assert shapes[0].count == 2
+    assert shapes[0].max_seconds == 0.5
+
+    path = str(tmp_path / 'shapes.json')
+    recorder.dump(path)
+    assert QueryShapeRecorder.load(path).shapes() == shapes
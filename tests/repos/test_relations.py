@@ -0,0 +1,48 @@
+import pytest
+
+from fixtures.models.researcher import Researcher
+from mongo_odm.repos.relations import (reference_keys, references, relation,
+                                       relation_filter, resolved)
+
+RESEARCHER = {'_id': '1',
+              'organisations': [
+                  {'name': 'A',
+                   'identifiers': [{'name': 'ringgold', 'value': '10'}]},
+                  {'name': 'B'}],
+              'experiences': [{'organisation': {'_id': 'o2'}},
+                              {'title': 'No organisation'}]}
+
+
+def test_relation():
+    assert relation(Researcher, 'organisations') == 'organisations'
+    assert relation(Researcher, 'experiences.organisation') == (
+        'organisations')
+    with pytest.raises(ValueError):
+        relation(Researcher, 'first_name')
+    with pytest.raises(ValueError):
+        relation(Researcher, 'experiences')
+
+
+def test_references():
+    assert [ref['name'] for ref in references(RESEARCHER,
+                                              'organisations')] == ['A', 'B']
+    assert references(RESEARCHER, 'experiences.organisation') == [
+        {'_id': 'o2'}]
+
+
+def test_relation_filter():
+    assert relation_filter(references(RESEARCHER, 'organisations') +
+                           references(RESEARCHER,
+                                      'experiences.organisation')) == {
+        '$or': [{'_id': {'$in': ['o2']}},
+                {'identifiers.value': {'$in': ['10']}}]}
+    assert relation_filter([{'name': 'B'}]) is None
+
+
+def test_resolved():
+    related = {'_id': 'o1',
+               'identifiers': [{'name': 'ringgold', 'value': '10'}]}
+    by_key = {key: related for key in reference_keys(related)}
+    assert resolved(RESEARCHER['organisations'][0], by_key) is related
+    assert resolved({'identifiers': [{'name': 'orcid', 'value': '10'}]},
+                    by_key) is None
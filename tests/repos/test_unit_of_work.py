@@ -0,0 +1,148 @@
+import pytest
+from pymongo.errors import BulkWriteError
+
+from fixtures.models.researcher import Researcher
+from mongo_odm.repos.repo import MongoRepo
+from mongo_odm.repos.repos import MongoRepos
+from mongo_odm.repos.unit_of_work import UnitOfWork
+
+COLLECTION = 'researchers'
+COUNT = 5
+
+
+@pytest.fixture(scope='module')
+def researchers_repo() -> MongoRepo:
+    return MongoRepos.repo(COLLECTION)
+
+
+@pytest.fixture()
+def reset_mongo(researchers_repo: MongoRepo) -> None:
+    researchers_repo.delete_all()
+    for i in range(1, COUNT + 1):
+        researchers_repo.insert_obj(Researcher(_id=str(i),
+                                               first_name=f'Name_{i}'))
+
+
+def test_identity_map(reset_mongo):
+    with UnitOfWork() as uow:
+        researcher = uow.query_by_id(COLLECTION, '1')
+        assert uow.query_by_id(COLLECTION, '1') is researcher
+        assert uow.query_one(COLLECTION, {'first_name': 'Name_1'}) is (
+            researcher)
+        assert uow.query_by_id(COLLECTION, '-1') is None
+
+
+def test_commit(researchers_repo: MongoRepo, reset_mongo):
+    with UnitOfWork() as uow:
+        researcher = uow.query_by_id(COLLECTION, '1')
+        researcher.first_name = 'Updated'
+        uow.replace(COLLECTION, researcher)
+        uow.delete(COLLECTION, uow.query_by_id(COLLECTION, '2'))
+        uow.insert(COLLECTION, Researcher(_id='6', first_name='Name_6'))
+
+        assert uow.query_by_id(COLLECTION, '2') is None
+        assert researchers_repo.query_by_id('1').first_name == 'Name_1'
+
+    assert researchers_repo.query_by_id('1').first_name == 'Updated'
+    assert not researchers_repo.exists_id('2')
+    assert researchers_repo.exists_id('6')
+
+
+def test_rollback(researchers_repo: MongoRepo, reset_mongo):
+    with pytest.raises(RuntimeError):
+        with UnitOfWork() as uow:
+            uow.insert(COLLECTION, Researcher(_id='6', first_name='Name_6'))
+            uow.delete(COLLECTION, uow.query_by_id(COLLECTION, '1'))
+            raise RuntimeError()
+
+    assert researchers_repo.count() == COUNT
+
+
+def test_merged_operations(researchers_repo: MongoRepo, reset_mongo):
+    with UnitOfWork() as uow:
+        researcher = Researcher(_id='6', first_name='Name_6')
+        uow.insert(COLLECTION, researcher)
+        uow.delete(COLLECTION, researcher)
+        uow.delete(COLLECTION, uow.query_by_id(COLLECTION, '1'))
+        uow.insert(COLLECTION, Researcher(_id='1', first_name='Reinserted'))
+
+    assert not researchers_repo.exists_id('6')
+    assert researchers_repo.query_by_id('1').first_name == 'Reinserted'
+
+
+def test_insert_then_delete(researchers_repo: MongoRepo, reset_mongo):
+    with UnitOfWork() as uow:
+        researcher = Researcher(_id='2', first_name='Name_2')
+        uow.insert(COLLECTION, researcher)
+        uow.delete(COLLECTION, researcher)
+
+    assert not researchers_repo.exists_id('2')
+
+
+def test_second_insert():
+    uow = UnitOfWork()
+    uow.insert(COLLECTION, Researcher(_id='6', first_name='Name_6'))
+    with pytest.raises(ValueError):
+        uow.insert(COLLECTION, Researcher(_id='6', first_name='Other'))
+
+
+def test_replace_then_insert(researchers_repo: MongoRepo, reset_mongo):
+    with UnitOfWork() as uow:
+        researcher = Researcher(_id='6', first_name='Name_6')
+        uow.replace(COLLECTION, researcher)
+        uow.insert(COLLECTION, researcher)
+
+    assert researchers_repo.query_by_id('6').first_name == 'Name_6'
+
+
+class FailingRepo(object):
+    def __init__(self) -> None:
+        self.requests = []
+
+    def bulk_write(self, requests, ordered=False):
+        self.requests.append(requests)
+        raise RuntimeError()
+
+
+def test_failed_commit_stays_pending(monkeypatch):
+    repo = FailingRepo()
+    monkeypatch.setattr(MongoRepos, 'repo', classmethod(lambda cls, _: repo))
+
+    uow = UnitOfWork(ordered=True)
+    first = Researcher(_id='6', first_name='Name_6')
+    uow.insert(COLLECTION, first)
+    uow.insert(COLLECTION, Researcher(_id='7', first_name='Name_7'))
+    uow.replace(COLLECTION, first)
+    with pytest.raises(RuntimeError):
+        uow.commit()
+    with pytest.raises(RuntimeError):
+        uow.commit()
+
+    assert len(repo.requests) == 2
+    retried = [request._doc['_id'] for request in repo.requests[1]]
+    assert retried == ['6', '7']
+
+
+class PartiallyFailingRepo(FailingRepo):
+    def bulk_write(self, requests, ordered=False):
+        self.requests.append(requests)
+        index = [request._doc['_id'] for request in requests].index('7')
+        raise BulkWriteError({'writeErrors': [{'index': index,
+                                               'code': 11000}]})
+
+
+@pytest.mark.parametrize('ordered, retried', [(False, ['7']),
+                                              (True, ['7', '8'])])
+def test_partial_commit(monkeypatch, ordered, retried):
+    repo = PartiallyFailingRepo()
+    monkeypatch.setattr(MongoRepos, 'repo', classmethod(lambda cls, _: repo))
+
+    uow = UnitOfWork(ordered=ordered)
+    for _id in ('6', '7', '8'):
+        uow.insert(COLLECTION, Researcher(_id=_id, first_name='Name'))
+    with pytest.raises(BulkWriteError):
+        uow.commit()
+    with pytest.raises(BulkWriteError):
+        uow.commit()
+
+    assert [request._doc['_id'] for request in repo.requests[1]] == retried
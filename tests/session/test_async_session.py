@@ -0,0 +1,15 @@
+import asyncio
+
+from mongo_odm.session.async_session import (_ASYNC_CLIENTS, async_client,
+                                             close_async_clients)
+
+
+def test_close_async_clients():
+    async def _open_and_close():
+        loop = asyncio.get_running_loop()
+        assert async_client() is async_client()
+        assert loop in _ASYNC_CLIENTS
+        await close_async_clients()
+        return loop in _ASYNC_CLIENTS
+
+    assert not asyncio.run(_open_and_close())
@@ -0,0 +1,84 @@
+import threading
+import time
+
+from mongo_odm.session.index_sync import (_matches, BACKGROUND, fingerprint,
+                                          IndexDiff, IndexSync)
+from mongo_odm.session.session import collection, INDEX_SYNC
+
+COLLECTION = 'researchers'
+
+
+def test_fingerprint():
+    assert fingerprint([COLLECTION]) == fingerprint([COLLECTION])
+    assert fingerprint([COLLECTION]) != fingerprint(['organisations'])
+
+
+def test_sync_all():
+    INDEX_SYNC.sync_all(force=True)
+    assert INDEX_SYNC.diff(COLLECTION) == IndexDiff([], [], [])
+
+
+def test_diff_extra_index():
+    INDEX_SYNC.sync_all()
+    researchers = collection(COLLECTION)
+    researchers.create_index('h_index', name='h_index_extra')
+    try:
+        assert INDEX_SYNC.diff(COLLECTION).extra == ['h_index_extra']
+    finally:
+        researchers.drop_index('h_index_extra')
+
+
+def test_fingerprint_skips_sync():
+    INDEX_SYNC.sync_all(force=True)
+    researchers = collection(COLLECTION)
+    researchers.drop_index('full_name_1')
+
+    INDEX_SYNC.reset()
+    collection(COLLECTION)
+    assert INDEX_SYNC.diff(COLLECTION).missing == ['full_name_1']
+
+    INDEX_SYNC.sync_all(force=True)
+    assert INDEX_SYNC.diff(COLLECTION).missing == []
+
+
+def test_text_index_key():
+    configured = {'key': [('keywords', 'text'), ('first_name', 'text')]}
+    live = {'key': [('_fts', 'text'), ('_ftsx', 1)],
+            'weights': {'first_name': 1, 'keywords': 1}}
+    assert _matches(configured, live)
+
+
+class SlowDatabase(dict):
+    """ Database double whose collections take a while to sync. """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.syncing = threading.Event()
+
+    def __missing__(self, name: str) -> 'SlowDatabase':
+        return self
+
+    def find_one(self, _filter):
+        return None
+
+    def replace_one(self, _filter, replacement, upsert=False):
+        pass
+
+    def create_indexes(self, models):
+        self.syncing.set()
+        time.sleep(0.5)
+
+    def create_collection(self, name):
+        self.create_indexes([])
+
+
+def test_background_ensure_does_not_wait():
+    database = SlowDatabase()
+    index_sync = IndexSync(db=lambda db_name: database, mode=BACKGROUND)
+    index_sync.ensure(COLLECTION)
+    assert database.syncing.wait(5)
+
+    start = time.monotonic()
+    index_sync.ensure(COLLECTION)
+    assert time.monotonic() - start < 0.1
+    index_sync._thread.join()
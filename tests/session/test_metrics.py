@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+from pymongo import monitoring
+
+from mongo_odm.session.metrics import (COMMAND_METRICS, POOL_METRICS,
+                                       prometheus_text, reset_metrics)
+
+ADDRESS = ('localhost', 27017)
+
+
+def _find(request_id: int) -> None:
+    COMMAND_METRICS.started(monitoring.CommandStartedEvent(
+        command={'find': 'researchers', 'filter': {}},
+        database_name='test_db',
+        request_id=request_id,
+        connection_id=ADDRESS,
+        operation_id=request_id))
+    COMMAND_METRICS.succeeded(monitoring.CommandSucceededEvent(
+        duration=timedelta(milliseconds=2),
+        reply={'cursor': {'id': 0, 'firstBatch': [{'_id': 1}, {'_id': 2}]},
+               'ok': 1},
+        command_name='find',
+        request_id=request_id,
+        connection_id=ADDRESS,
+        operation_id=request_id,
+        database_name='test_db'))
+
+
+def test_command_metrics():
+    reset_metrics()
+    _find(1)
+    _find(2)
+
+    stats = COMMAND_METRICS.snapshot()[('test_db', 'researchers', 'find')]
+    assert stats['latency']['count'] == 2
+    assert stats['latency']['buckets'][0.0025] == 2
+    assert stats['latency']['buckets'][0.001] == 0
+    assert stats['docs_returned'] == 4
+    assert stats['bytes_sent'] == 0
+    assert 'mongo_odm_bytes_sent_total' not in prometheus_text()
+
+
+def test_command_metrics_bytes(monkeypatch):
+    monkeypatch.setattr(COMMAND_METRICS, 'count_bytes', True)
+    reset_metrics()
+    _find(1)
+
+    stats = COMMAND_METRICS.snapshot()[('test_db', 'researchers', 'find')]
+    assert stats['bytes_sent'] > 0
+    assert stats['bytes_received'] > 0
+    assert 'mongo_odm_bytes_sent_total' in prometheus_text()
+
+
+def test_prometheus_text():
+    reset_metrics()
+    _find(1)
+    POOL_METRICS.connection_checked_out(monitoring.ConnectionCheckedOutEvent(
+        ADDRESS, 1, 0.0001))
+
+    text = prometheus_text()
+    labels = 'db="test_db",collection="researchers",command="find"'
+    assert (f'mongo_odm_command_duration_seconds_bucket{{{labels},'
+            f'le="+Inf"}} 1') in text
+    assert f'mongo_odm_docs_returned_total{{{labels}}} 2' in text
+    assert ('mongo_odm_pool_wait_seconds_count{address="localhost:27017"} 1'
+            in text)
@@ -0,0 +1,31 @@
+import multiprocessing
+
+from mongo_odm.config.config import ClientOptions
+from mongo_odm.session.session import client
+
+
+def _is_new_client(parent_client_id: int, queue: multiprocessing.Queue):
+    queue.put(id(client()) != parent_client_id and client() is client())
+
+
+def test_client_per_process():
+    assert client() is client()
+
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    process = context.Process(target=_is_new_client,
+                              args=(id(client()), queue))
+    process.start()
+    process.join()
+    assert queue.get()
+
+
+def test_client_options_params():
+    options = ClientOptions(max_pool_size=10,
+                            min_pool_size=2,
+                            max_idle_time_ms=60000,
+                            compressors=('zstd', 'zlib'))
+    assert options.params() == {'maxPoolSize': 10,
+                                'minPoolSize': 2,
+                                'maxIdleTimeMS': 60000,
+                                'compressors': 'zstd,zlib'}
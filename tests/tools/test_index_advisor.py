@@ -0,0 +1,42 @@
+from mongo_odm.config.config import Field, Index
+from mongo_odm.repos.query_shapes import QueryShapeRecorder
+from mongo_odm.tools.index_advisor import (advice_yaml, advise, is_covered,
+                                           Predicate)
+
+COLLECTION = 'researchers'
+
+
+def test_is_covered():
+    index = Index(fields=[Field('country.code', 1), Field('h_index', -1),
+                          Field('citation_count', 1)])
+    assert is_covered(Predicate(equality=('country.code',),
+                                range=('citation_count',),
+                                sort=(('h_index', 1),)), index)
+    assert not is_covered(Predicate(equality=('country.code',),
+                                    range=('h_index',),
+                                    sort=(('citation_count', 1),)), index)
+    assert not is_covered(Predicate(equality=('h_index',),
+                                    range=(),
+                                    sort=()), index)
+
+
+def test_advise():
+    recorder = QueryShapeRecorder()
+    recorder.record(COLLECTION, 'find',
+                    {'first_name': 'A', 'last_name': 'B'}, None, 0.1)
+    recorder.record(COLLECTION, 'find',
+                    {'country.code': 'be', 'h_index': {'$gt': 5}},
+                    [('citation_count', -1)], 0.1)
+
+    advice = advise(recorder.shapes())[COLLECTION]
+    assert [[(f.name, f.order) for f in index.fields]
+            for index in advice.missing] == [[('country.code', 1),
+                                              ('citation_count', -1),
+                                              ('h_index', 1)]]
+    assert [index.fields[0].name for index in advice.unused] == [
+        'full_name', '_metadata.sources_hash',
+        '_metadata.normalized_names', '_hash']
+
+    text = advice_yaml({COLLECTION: advice})
+    assert '- name: citation_count\n      order: desc' in text
+    assert '# researchers: unused index full_name asc' in text
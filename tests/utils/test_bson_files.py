@@ -0,0 +1,43 @@
+import os
+
+import pytest
+from bson import encode
+from bson.raw_bson import RawBSONDocument
+
+from mongo_odm.utils.bson_files import (GZIP, read_manifest, read_segments,
+                                        write_segments)
+
+DOCS = [RawBSONDocument(encode({'_id': i, 'name': 'x' * i}))
+        for i in range(100)]
+
+
+@pytest.mark.parametrize('compression', [None, GZIP])
+def test_round_trip(tmp_path, compression):
+    directory = str(tmp_path / 'researchers')
+    manifest = write_segments(iter(DOCS), directory,
+                              compression=compression,
+                              segment_bytes=1000)
+
+    assert manifest == read_manifest(directory)
+    assert manifest['count'] == len(DOCS)
+    assert len(manifest['segments']) > 1
+    assert all(segment['bytes'] <= 1000
+               for segment in manifest['segments'])
+    assert [doc.raw for doc in read_segments(directory)] == \
+        [doc.raw for doc in DOCS]
+
+
+def test_truncated_segment(tmp_path):
+    directory = str(tmp_path / 'researchers')
+    manifest = write_segments(iter(DOCS), directory, compression=None)
+    path = os.path.join(directory, manifest['segments'][0]['file'])
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) - 1)
+
+    with pytest.raises(ValueError):
+        list(read_segments(directory))
+
+
+def test_unknown_compression(tmp_path):
+    with pytest.raises(ValueError):
+        write_segments(iter(DOCS), str(tmp_path), compression='lz4')
@@ -0,0 +1,76 @@
+import multiprocessing
+import os
+
+import pytest
+
+from mongo_odm.utils import shm_ring
+from mongo_odm.utils.shm_ring import SharedRing, wait_readable
+
+FRAMES = [bytes([i]) * (i * 37) for i in range(20)]
+
+
+def _produce(ring: SharedRing, fail: bool) -> None:
+    try:
+        for frame in FRAMES:
+            ring.put(frame)
+        if fail:
+            raise ValueError('failed')
+    except Exception as e:
+        ring.put_error(e)
+    finally:
+        ring.close()
+
+
+def _die_in_frame(ring: SharedRing) -> None:
+    ring._write(shm_ring._HEADER.pack(100, shm_ring._DATA))
+    ring._write(b'partial')
+    os._exit(1)
+
+
+def _consume(ring: SharedRing, fail: bool = False):
+    process = multiprocessing.Process(target=_produce, args=(ring, fail))
+    process.start()
+    try:
+        frames = []
+        while True:
+            frame = ring.get()
+            if frame is None:
+                return frames
+            frames.append(frame)
+    finally:
+        process.join()
+        ring.unlink()
+
+
+def test_frames_larger_than_ring():
+    assert _consume(SharedRing(capacity=64)) == FRAMES
+
+
+def test_producer_error():
+    with pytest.raises(ValueError):
+        _consume(SharedRing(capacity=64), fail=True)
+
+
+def test_wait_readable():
+    condition = multiprocessing.Condition()
+    rings = [SharedRing(capacity=64, condition=condition) for _ in range(2)]
+    try:
+        assert wait_readable(rings, condition, timeout=0.01) is None
+        rings[1].put(b'frame')
+        assert wait_readable(rings, condition, timeout=0.01) is rings[1]
+    finally:
+        for ring in rings:
+            ring.unlink()
+
+
+def test_producer_dies_in_frame(monkeypatch):
+    monkeypatch.setattr(shm_ring, 'LIVENESS_INTERVAL', 0.05)
+    ring = SharedRing(capacity=64)
+    process = multiprocessing.Process(target=_die_in_frame, args=(ring,))
+    process.start()
+    try:
+        with pytest.raises(RuntimeError):
+            ring.get(producer=process)
+    finally:
+        process.join()
+        ring.unlink()
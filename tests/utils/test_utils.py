@@ -0,0 +1,74 @@
+import threading
+import time
+
+import pytest
+
+from mongo_odm.utils.cache import LRUCache
+from mongo_odm.utils.utils import chunks, prefetched, sized_chunks
+
+
+def test_chunks():
+    assert [list(chunk) for chunk in chunks(range(5), 2)] == [
+        [0, 1], [2, 3], [4]]
+
+
+def test_sized_chunks_by_count():
+    assert list(sized_chunks(iter(range(5)), n=2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_sized_chunks_by_bytes():
+    words = ['aaaa', 'bb', 'cc', 'dddddd', 'e']
+    assert list(sized_chunks(words, n=10, max_bytes=4, sizeof=len)) == [
+        ['aaaa'], ['bb', 'cc'], ['dddddd'], ['e']]
+
+
+def test_lru_cache_eviction():
+    cache = LRUCache(max_size=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats() == {'hits': 3, 'misses': 1, 'size': 2}
+
+
+def test_lru_cache_ttl():
+    cache = LRUCache(max_size=2, ttl=0.01)
+    cache.set('a', 1)
+    time.sleep(0.02)
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_prefetched():
+    assert list(prefetched(iter(range(10)),
+                           num_of_batches=2,
+                           batch_size=3)) == list(range(10))
+
+
+def test_prefetched_error():
+    def failing():
+        yield 1
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        list(prefetched(failing(), num_of_batches=2, batch_size=1))
+
+
+def test_prefetched_close():
+    closed = threading.Event()
+
+    def endless():
+        try:
+            while True:
+                yield 1
+        finally:
+            closed.set()
+
+    iterator = prefetched(endless(), num_of_batches=2, batch_size=10)
+    assert next(iterator) == 1
+    iterator.close()
+    assert closed.is_set()